@@ -0,0 +1,435 @@
+"""AsyncHaloSession and AsyncHttpHelper classes.
+
+Asyncio counterparts to :class:`cloudpassage.HaloSession` and
+:class:`cloudpassage.HttpHelper`.  These require Python 3.6+ and the aiohttp
+package (``pip install cloudpassage[async]``).
+"""
+
+import asyncio
+import random
+import ssl
+from .exceptions import CloudPassageAuthentication
+from .exceptions import CloudPassageValidation
+from .halo import HaloSession
+from .http_helper import HttpHelper
+from .json_codec import JsonCodec
+from .retry import HaloRetry
+from .utility import Utility as utility
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class AsyncResponse(object):
+    """Status, headers and body from an :class:`AsyncHaloSession` request.
+
+    aiohttp responses must be read before their connection is released, so
+    the body is read once and kept here.  The attributes mirror the parts of
+    ``requests.Response`` used by the SDK.
+
+    Attributes:
+        status_code (int): HTTP status code.
+        headers (dict): Response headers.
+        content (bytes): Response body.
+        codec (:class:`cloudpassage.JsonCodec`): Codec used by :meth:`json`.
+    """
+
+    def __init__(self, status_code, headers, content, codec=None):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.codec = codec if codec is not None else JsonCodec()
+
+    @property
+    def text(self):
+        """Response body, decoded as UTF-8."""
+        return self.content.decode("utf-8", "replace")
+
+    def json(self):
+        """Response body, decoded from JSON."""
+        return self.codec.loads(self.content)
+
+
+class AsyncHaloSession(HaloSession):
+    """Create an asyncio Halo API connection object.
+
+    This accepts the same arguments as :class:`cloudpassage.HaloSession`, and
+    authenticates, retries and parses response statuses the same way.  All
+    request methods are coroutines.  Close the session with
+    :meth:`close`, or use it as an async context manager.
+
+    Example::
+
+        async with cloudpassage.AsyncHaloSession(key, secret) as session:
+            servers = await cloudpassage.Server(session).list_all_async()
+
+    Args:
+        apikey (str): API key, retrieved from your CloudPassage Halo account
+        apisecret (str): API key secret, found with your API key in your
+            CloudPassage Halo account
+
+    Keyword Args:
+        max_concurrency (int): Maximum number of simultaneous connections to
+            the Halo API.  Defaults to 100.
+
+    """
+
+    def __init__(self, apikey, apisecret, **kwargs):
+        if aiohttp is None:
+            raise ImportError("AsyncHaloSession requires the aiohttp package")
+        self.max_concurrency = kwargs.get("max_concurrency", 100)
+        self.connection_errors = (aiohttp.ClientError, asyncio.TimeoutError)
+        super(AsyncHaloSession, self).__init__(apikey, apisecret, **kwargs)
+        # Tokens are refreshed ahead of expiry by interact(), not a thread.
+        self.background_token_refresh = False
+
+    def build_client(self):
+        """Defer creation of the aiohttp client until first use.
+
+        aiohttp sessions must be created while the event loop is running.
+        See :meth:`get_client`.
+        """
+        self.client = None
+        self.auth_lock = None
+        self.proxy_url = None
+        if self.proxy_host:
+            self.proxy_url = self.build_proxy_struct(self.proxy_host,
+                                                     self.proxy_port)["https"]
+        return None
+
+    def ensure_pool_capacity(self, size):
+        """Not used; the connection limit is set by ``max_concurrency``."""
+        return None
+
+    def get_client(self):
+        """Return the aiohttp client, creating it if necessary."""
+        if self.client is None or self.client.closed:
+            ssl_context = None
+            if self.requests_ca_bundle:
+                ssl_context = ssl.create_default_context(
+                    cafile=self.requests_ca_bundle)
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency,
+                                             ssl=ssl_context)
+            timeout = aiohttp.ClientTimeout(sock_connect=self.connect_timeout,
+                                            sock_read=self.read_timeout)
+            self.client = aiohttp.ClientSession(connector=connector,
+                                                timeout=timeout)
+            self.auth_lock = asyncio.Lock()
+        if self.auth_lock is None:
+            self.auth_lock = asyncio.Lock()
+        return self.client
+
+    async def close(self):
+        """Close the aiohttp client and its connections."""
+        if self.client is not None:
+            await self.client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def authenticate_client(self):
+        """This coroutine attempts to set an OAuth token.
+
+        See :meth:`cloudpassage.HaloSession.authenticate_client`.
+        """
+        success = False
+        endpoint, headers = self.build_auth_request()
+        client = self.get_client()
+        max_tries = 5
+        for _ in range(max_tries):
+            async with client.post(endpoint, headers=headers,
+                                   proxy=self.proxy_url) as resp:
+                status = resp.status
+                body = await resp.read()
+            if status == 401:
+                exc_msg = "Invalid credentials- can not obtain session token."
+                raise CloudPassageAuthentication(exc_msg)
+            if status == 200:
+                auth_resp_json = self.json_codec.loads(body)
+                self.set_auth_token(auth_resp_json["access_token"],
+                                    auth_resp_json.get("scope"),
+                                    auth_resp_json.get("expires_in"))
+                success = True
+                break
+            else:
+                await asyncio.sleep(1)
+        return success
+
+    async def refresh_auth(self, stale_token):
+        """Authenticate, unless another task has already replaced the token.
+
+        Concurrent callers wait on the same lock, so a burst of 401s results
+        in a single call to :meth:`authenticate_client`.
+
+        Args:
+            stale_token (str): Token in use when the caller decided to
+                authenticate.  None if the session has no token yet.
+        """
+        self.get_client()
+        async with self.auth_lock:
+            if self.auth_token is None or self.auth_token == stale_token:
+                await self.authenticate_client()
+
+    async def interact(self, verb, endpoint, params=None, reqbody=None):
+        """This coroutine wraps common Halo interaction functionality.
+
+        See :meth:`cloudpassage.HaloSession.interact`.
+
+        Returns:
+            :class:`AsyncResponse`
+        """
+        url = "%s%s" % (self.build_endpoint_prefix(), endpoint)
+        if verb not in ["get", "post", "put", "delete"]:
+            raise ValueError("Invalid HTTP verb for Halo API: %s" % verb)
+        if self.auth_token is None:
+            await self.refresh_auth(None)
+        elif self.token_expiring():
+            await self.refresh_auth(self.auth_token)
+        success, response, exception = await self.try_wrapper(verb, url,
+                                                              params, reqbody)
+        if success:
+            return response
+        raise exception
+
+    async def try_wrapper(self, verb, url, params, reqbody):
+        """Wraps tries, reauthenticating once on 401.
+
+        Returns:
+            success (bool)
+            response (:class:`AsyncResponse`)
+            exception (Exception)
+        """
+        token = self.auth_token
+        success, response, exception = await self.get_response(verb, url,
+                                                               params,
+                                                               reqbody)
+        if response.status_code == 401:  # Try to reauth once.
+            await self.refresh_auth(token)
+            success, response, exception = await self.get_response(verb, url,
+                                                                   params,
+                                                                   reqbody)
+        return success, response, exception
+
+    async def get_response(self, verb, url, params, reqbody):
+        """Base coroutine for getting response from Halo API.
+
+        Responses with a status in ``retry_statuses`` are retried up to
+        ``max_retries`` times, while the session's retry budget lasts.  As
+        with the urllib3 retries used by :class:`cloudpassage.HaloSession`,
+        so are failures to connect, and other connection errors and
+        timeouts for idempotent requests.  Delays follow
+        :class:`cloudpassage.HaloRetry`.
+
+        Returns:
+            success (bool)
+            response (:class:`AsyncResponse`)
+            exception (Exception)
+        """
+        client = self.get_client()
+        request_args = {"headers": self.build_header(),
+                        "proxy": self.proxy_url}
+        if verb in ['get', 'delete']:
+            if params:
+                request_args["params"] = {k: str(v)
+                                          for k, v in params.items()}
+        else:
+            request_args["data"] = self.json_codec.dumps(reqbody)
+        probing = False
+        if self.circuit_breaker is not None:
+            probing = self.circuit_breaker.before_request(url)
+        recorded = False
+        try:
+            try:
+                response = await self.send_with_retries(client, verb, url,
+                                                        request_args)
+            except self.connection_errors as exc:
+                recorded = self.record_outcome(url, None, exc)
+                raise
+            recorded = self.record_outcome(url, response)
+        finally:
+            if probing and not recorded:
+                self.circuit_breaker.release_probe(url)
+        success, exception = utility.parse_status(url, response.status_code,
+                                                  response.text)
+        return success, response, exception
+
+    async def send_with_retries(self, client, verb, url, request_args):
+        """Send a request, retrying as described in :meth:`get_response`.
+
+        Returns:
+            :class:`AsyncResponse`: The last response received.
+
+        Raises:
+            aiohttp.ClientError: The last connection error, if no response
+                was received.
+            asyncio.TimeoutError: The request timed out, and was not
+                retried.
+        """
+        delay = None
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter is not None:
+                wait = self.rate_limiter.reserve(url)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            try:
+                async with client.request(verb.upper(), url,
+                                          **request_args) as resp:
+                    response = AsyncResponse(resp.status, resp.headers,
+                                             await resp.read(),
+                                             self.json_codec)
+            except self.connection_errors as exc:
+                if (not self.is_retryable_error(verb, exc) or
+                        not self.may_retry(attempt)):
+                    raise
+                delay = HaloRetry.next_backoff(self.backoff_factor, delay,
+                                               HaloRetry.max_backoff)
+                await asyncio.sleep(delay)
+                continue
+            if (response.status_code not in self.retry_statuses or
+                    not self.may_retry(attempt)):
+                break
+            delay = self.get_retry_delay(response, delay)
+            await asyncio.sleep(delay)
+        return response
+
+    def may_retry(self, attempt):
+        """Return True if another attempt may follow attempt ``attempt``.
+
+        Takes a token from the retry budget, if there is one.
+        """
+        if attempt >= self.max_retries:
+            return False
+        return self.retry_bucket is None or self.retry_bucket.try_acquire()
+
+    @classmethod
+    def is_retryable_error(cls, verb, exc):
+        """Return True if a request which raised ``exc`` may be retried.
+
+        A failure to connect means the request was never sent, so it is
+        always retried.  Other connection errors and timeouts are only
+        retried for idempotent verbs, as urllib3 does.
+        """
+        if isinstance(exc, aiohttp.ClientConnectorError):
+            return True
+        return verb in ["get", "put", "delete"]
+
+    def get_retry_delay(self, response, last_delay):
+        """Return seconds to wait before retrying.
+
+        Honors a numeric ``Retry-After`` header or ``X-RateLimit-Reset``,
+        plus jitter, otherwise backs off with decorrelated jitter.
+
+        Args:
+            response (:class:`AsyncResponse`): Response to be retried.
+            last_delay (float): Previous delay for this request, or None.
+        """
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            retry_after = int(retry_after)
+        else:
+            retry_after = HaloRetry.get_rate_limit_reset(response.headers)
+        if retry_after is not None:
+            return retry_after + random.uniform(0, self.backoff_factor)
+        return HaloRetry.next_backoff(self.backoff_factor, last_delay,
+                                      HaloRetry.max_backoff)
+
+
+class AsyncHttpHelper(object):
+    """Asyncio counterpart to :class:`cloudpassage.HttpHelper`.
+
+    When instantiating this class, pass in a
+    :class:`cloudpassage.AsyncHaloSession` object.  All request methods are
+    coroutines.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    async def get(self, endpoint, **kwargs):
+        """This coroutine performs a GET against Halo's API.
+
+        See :meth:`cloudpassage.HttpHelper.get`.
+        """
+        params = kwargs["params"] if "params" in kwargs else None
+        response = await self.connection.interact('get', endpoint, params)
+        return response.json()
+
+    async def get_object(self, endpoint, key):
+        """Return the object found under ``key`` in the response to a GET."""
+        response = await self.get(endpoint)
+        return response[key]
+
+    async def get_paginated(self, endpoint, key, max_pages, **kwargs):
+        """This coroutine returns a concatenated list of objects.
+
+        See :meth:`cloudpassage.HttpHelper.get_paginated`.
+        """
+        response_accumulator = []
+        async for item in self.iter_paginated(endpoint, key, max_pages,
+                                              **kwargs):
+            response_accumulator.append(item)
+        return response_accumulator
+
+    async def iter_paginated(self, endpoint, key, max_pages, **kwargs):
+        """Asynchronously yield objects from the Halo API, page by page.
+
+        See :meth:`cloudpassage.HttpHelper.iter_paginated`.  If ``prefetch``
+        is set, up to that many of the remaining pages are requested
+        concurrently.
+        """
+        max_pages_valid, pages_invalid_msg = utility.verify_pages(max_pages)
+        if not max_pages_valid:
+            raise CloudPassageValidation(pages_invalid_msg)
+        params = kwargs.get("params")
+        page = await self.get(endpoint, params=params if params else None)
+        pages_parsed = 1
+        prefetch = kwargs.get("prefetch", 0)
+        fields = kwargs.get("fields")
+        while True:
+            response, next_page = HttpHelper.process_page(page, key, fields)
+            for item in response:
+                yield item
+            if next_page is None or pages_parsed >= max_pages:
+                return
+            if prefetch and pages_parsed == 1 and "count" in page:
+                page_paths = HttpHelper.get_remaining_page_paths(
+                    page, next_page, len(response), max_pages)
+                for idx in range(0, len(page_paths), prefetch):
+                    chunk = page_paths[idx:idx + prefetch]
+                    pages = await asyncio.gather(*[self.get(x)
+                                                   for x in chunk])
+                    for prefetched in pages:
+                        for item in HttpHelper.process_page(prefetched, key,
+                                                            fields)[0]:
+                            yield item
+                return
+            page = await self.get(next_page)
+            pages_parsed += 1
+
+    async def post(self, endpoint, reqbody):
+        """This coroutine performs a POST against Halo's API."""
+        response = await self.connection.interact("post", endpoint, None,
+                                                  reqbody)
+        return response.json()
+
+    async def put(self, endpoint, reqbody):
+        """This coroutine performs a PUT against Halo's API."""
+        response = await self.connection.interact("put", endpoint, None,
+                                                  reqbody)
+        try:
+            return response.json()
+        except ValueError:  # Sometimes we don't get json back...
+            return response.text
+
+    async def delete(self, endpoint, **kwargs):
+        """This coroutine performs a DELETE against Halo's API."""
+        params = kwargs["params"] if "params" in kwargs else None
+        response = await self.connection.interact('delete', endpoint, params)
+        try:
+            return response.json()
+        except ValueError:  # Sometimes we don't get json back...
+            return response.text
@@ -0,0 +1,83 @@
+"""BulkExecutor class"""
+
+from multiprocessing.dummy import Pool as ThreadPool
+from .utility import Utility as utility
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+
+class BulkExecutor(object):
+    """Run one call per object concurrently, streaming back the results.
+
+    All calls share the session's connection pool, retry budget and rate
+    limiter, so a fleet-wide run is throttled like any other use of the
+    session.  An exception raised by one call is captured and returned with
+    that object's result, and does not stop the run.
+
+    Results are yielded as calls complete, not in input order.  At most
+    ``concurrency * 2`` calls are queued ahead of the consumer, so object
+    IDs may come from a generator, and a slow consumer does not cause
+    results to pile up in memory.
+
+    Example::
+
+        executor = cloudpassage.BulkExecutor(session, concurrency=20)
+        server = cloudpassage.Server(session)
+        for server_id, packages, exc in executor.run(server.list_packages,
+                                                     server_ids):
+            if exc is not None:
+                print("Failed for %s: %s" % (server_id, exc))
+
+    Args:
+        session (:class:`cloudpassage.HaloSession`): Session used by the
+            calls being run.
+        concurrency (int): Number of calls to run at once.  Defaults to 10.
+    """
+
+    def __init__(self, session, concurrency=10):
+        self.session = session
+        self.concurrency = concurrency
+
+    def run(self, function, object_ids, **kwargs):
+        """Call ``function(object_id, **kwargs)`` for each object ID.
+
+        Args:
+            function (callable): Function taking an object ID.
+            object_ids (iterable): Object IDs.
+
+        Yields:
+            tuple: (object_id, result, exception).  ``exception`` is None
+                if the call succeeded, otherwise ``result`` is None.
+        """
+        utility.ensure_pool_capacity(self.session, self.concurrency)
+        results = queue.Queue()
+        pool = ThreadPool(self.concurrency)
+        pending = 0
+        try:
+            for object_id in object_ids:
+                if pending >= self.concurrency * 2:
+                    yield results.get()
+                    pending -= 1
+                pool.apply_async(self.call, (function, object_id, kwargs),
+                                 callback=results.put)
+                pending += 1
+            while pending:
+                yield results.get()
+                pending -= 1
+        finally:
+            pool.terminate()
+            pool.join()
+
+    @classmethod
+    def call(cls, function, object_id, kwargs):
+        """Call ``function`` for one object ID, capturing any exception.
+
+        Returns:
+            tuple: (object_id, result, exception)
+        """
+        try:
+            return object_id, function(object_id, **kwargs), None
+        except Exception as exc:  # pylint: disable=broad-except
+            return object_id, None, exc
@@ -0,0 +1,121 @@
+"""Checkpoint stores for TimeSeries.
+
+A checkpoint records a time-series stream's cursor (the ``created_at``
+timestamp of the last item delivered) and the IDs of the items delivered
+with exactly that timestamp.  A stream resumed from a checkpoint starts at
+the cursor and skips those IDs, so nothing is missed or repeated at the
+boundary.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+
+# os.replace() overwrites an existing file on Windows, but is Python 3 only.
+replace_file = getattr(os, "replace", os.rename)
+
+
+class FileCheckpointStore(object):
+    """Store checkpoints in a JSON file.
+
+    The file is rewritten atomically on every save.  Use one file per
+    process; for checkpoints shared between processes, use
+    :class:`SqliteCheckpointStore`.
+
+    Args:
+        path (str): Path to the checkpoint file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def read(self):
+        """Return all checkpoints in the file, as a dict."""
+        try:
+            with open(self.path, "r") as checkpoint_file:
+                return json.load(checkpoint_file)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def load(self, key):
+        """Return the checkpoint for ``key``.
+
+        Args:
+            key (str): Name of the stream.
+
+        Returns:
+            dict: Checkpoint, with keys ``since`` (str) and ``ids`` (list).
+                None if there is no checkpoint for ``key``.
+        """
+        with self.lock:
+            return self.read().get(key)
+
+    def save(self, key, since, ids):
+        """Save the checkpoint for ``key``.
+
+        Args:
+            key (str): Name of the stream.
+            since (str): ISO 8601 timestamp of the last item delivered.
+            ids (list): IDs of delivered items with ``created_at`` equal to
+                ``since``.
+        """
+        with self.lock:
+            contents = self.read()
+            contents[key] = {"since": since, "ids": list(ids)}
+            tmp_path = "{}.{}.tmp".format(self.path, os.getpid())
+            with open(tmp_path, "w") as checkpoint_file:
+                json.dump(contents, checkpoint_file)
+            replace_file(tmp_path, self.path)
+        return None
+
+
+class SqliteCheckpointStore(object):
+    """Store checkpoints in a SQLite database.
+
+    Each call opens its own connection, so one store may be shared between
+    threads, and one database file between processes.
+
+    Args:
+        path (str): Path to the database file.  It is created if it does
+            not exist.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        connection = sqlite3.connect(self.path)
+        with connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS checkpoints "
+                               "(key TEXT PRIMARY KEY, since TEXT, ids TEXT)")
+        connection.close()
+
+    def load(self, key):
+        """Return the checkpoint for ``key``.
+
+        See :meth:`FileCheckpointStore.load`.
+        """
+        connection = sqlite3.connect(self.path)
+        try:
+            row = connection.execute("SELECT since, ids FROM checkpoints "
+                                     "WHERE key = ?", (key,)).fetchone()
+        finally:
+            connection.close()
+        if row is None:
+            return None
+        return {"since": row[0], "ids": json.loads(row[1])}
+
+    def save(self, key, since, ids):
+        """Save the checkpoint for ``key``.
+
+        See :meth:`FileCheckpointStore.save`.
+        """
+        connection = sqlite3.connect(self.path)
+        try:
+            with connection:
+                connection.execute("INSERT OR REPLACE INTO checkpoints "
+                                   "(key, since, ids) VALUES (?, ?, ?)",
+                                   (key, since, json.dumps(list(ids))))
+        finally:
+            connection.close()
+        return None
@@ -0,0 +1,115 @@
+"""CircuitBreaker class.
+
+Fail fast on requests to Halo API endpoints which are persistently failing.
+"""
+
+import threading
+from .exceptions import CloudPassageCircuitOpen
+from .rate_limiter import monotonic
+# This is for Python 3 compatibility
+try:
+    from urllib.parse import urlsplit
+except ImportError:
+    from urlparse import urlsplit
+
+
+class CircuitBreaker(object):
+    """Per-endpoint circuit breaker for a :class:`cloudpassage.HaloSession`.
+
+    Each endpoint (the first two path segments of the URL, like
+    ``/v1/servers``) has its own circuit.  After ``threshold`` consecutive
+    failures (a 5xx response after retries, or a connection error or
+    timeout), the circuit opens, and requests to that endpoint raise
+    :class:`cloudpassage.CloudPassageCircuitOpen` without contacting the
+    API.  After ``reset_timeout`` seconds, the circuit is half-open: one
+    request is let through as a probe, while the rest keep failing fast.  If
+    the probe succeeds the circuit closes, otherwise it opens again.  If the
+    probe ends without a recorded outcome, like an exception which is
+    neither a success nor a failure, the next request becomes the probe.
+
+    The same breaker may be shared by several sessions.
+
+    Args:
+        threshold (int): Consecutive failures which open a circuit.
+        reset_timeout (float): Seconds an open circuit waits before letting
+            a probe request through.  Defaults to 30.
+    """
+
+    def __init__(self, threshold, reset_timeout=30):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.circuits = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def get_circuit_key(cls, url):
+        """Return the endpoint of ``url`` which identifies its circuit."""
+        path = urlsplit(url).path
+        return "/".join(path.split("/")[:3])
+
+    def get_state(self, url):
+        """Return the state of the circuit for ``url``.
+
+        Returns:
+            str: ``closed``, ``open`` or ``half-open``.
+        """
+        with self.lock:
+            circuit = self.circuits.get(self.get_circuit_key(url))
+            if circuit is None or circuit["opened_at"] is None:
+                return "closed"
+            if (circuit["probing"] or
+                    monotonic() - circuit["opened_at"] >= self.reset_timeout):
+                return "half-open"
+            return "open"
+
+    def before_request(self, url):
+        """Check that a request to ``url`` may be sent.
+
+        Returns:
+            bool: True if the request is the probe of a half-open circuit.
+                The caller must then record its outcome, or call
+                :meth:`release_probe`.
+
+        Raises:
+            CloudPassageCircuitOpen: If the endpoint's circuit is open, or
+                if it is half-open and a probe request is already in flight.
+        """
+        key = self.get_circuit_key(url)
+        with self.lock:
+            circuit = self.circuits.get(key)
+            if circuit is None or circuit["opened_at"] is None:
+                return False
+            waited = monotonic() - circuit["opened_at"]
+            if circuit["probing"] or waited < self.reset_timeout:
+                exc_msg = "Circuit open for %s after %s failures" % (
+                    key, circuit["failures"])
+                raise CloudPassageCircuitOpen(exc_msg)
+            circuit["probing"] = True
+        return True
+
+    def release_probe(self, url):
+        """Let another probe through, after one whose outcome is unknown."""
+        with self.lock:
+            circuit = self.circuits.get(self.get_circuit_key(url))
+            if circuit is not None:
+                circuit["probing"] = False
+        return None
+
+    def record_success(self, url):
+        """Close the circuit for ``url``."""
+        with self.lock:
+            self.circuits.pop(self.get_circuit_key(url), None)
+        return None
+
+    def record_failure(self, url):
+        """Count a failure against the circuit for ``url``."""
+        key = self.get_circuit_key(url)
+        with self.lock:
+            circuit = self.circuits.setdefault(key, {"failures": 0,
+                                                     "opened_at": None,
+                                                     "probing": False})
+            circuit["failures"] += 1
+            if circuit["probing"] or circuit["failures"] >= self.threshold:
+                circuit["opened_at"] = monotonic()
+                circuit["probing"] = False
+        return None
@@ -2,7 +2,6 @@
 
 
 from .utility import Utility as utility
-from .http_helper import HttpHelper
 from .halo_endpoint import HaloEndpoint
 from .time_series import TimeSeries
 
@@ -56,30 +55,51 @@ class Event(HaloEndpoint):
                 date and time for query
             until (str): ISO 8601 formatted string representing the ending
                 date and time for query
+            fields (list): Keys to keep in each object.  See
+                :meth:`cloudpassage.HaloEndpoint.list_all`.
+            stream (bool): If True, return a generator which yields events
+                page by page, instead of a list.  Defaults to False.
+            prefetch (int): Number of threads retrieving pages
+                concurrently.  Defaults to the endpoint's ``prefetch``.
 
         Returns:
             list: List of dictionary objects describing servers
 
         """
 
-        endpoint = self.endpoint()
-        max_pages = pages
-        request = HttpHelper(self.session)
-        params = utility.sanitize_url_params(kwargs)
-        response = request.get_paginated(endpoint, self.objects_name,
-                                         max_pages, params=params)
-        return response
+        return self.list_paginated(self.objects_name, pages, kwargs)
 
     def stream(self, start_time, **kwargs):
         """Yield events beginning at ``start_time``.
 
         This generator supports the same keyword arguments as
-        :func:`~cloudpasssage.Event.list_all`
+        :func:`~cloudpasssage.Event.list_all`, plus the following.
+
+        Keyword Args:
+            checkpoint_store (object): Checkpoint store for resuming the
+                stream after a restart.  If it holds a checkpoint under
+                ``checkpoint_key``, ``start_time`` is ignored.  See
+                :class:`cloudpassage.TimeSeries`.
+            checkpoint_key (str): Name of this stream in the checkpoint
+                store.  Defaults to the events endpoint path.
+            min_poll_interval (float): Seconds to wait after the first empty
+                batch.  See :class:`cloudpassage.TimeSeries`.
+            max_poll_interval (float): Longest wait between polls while no
+                new events are arriving.
+            prefetch_batches (int): Number of batches to retrieve ahead of
+                the consumer, in a background thread.
         """
+        stream_args = {}
+        for arg in ["checkpoint_store", "checkpoint_key",
+                    "min_poll_interval", "max_poll_interval",
+                    "prefetch_batches"]:
+            if arg in kwargs:
+                stream_args[arg] = kwargs.pop(arg)
         params = utility.sanitize_url_params(kwargs)
         start_url = self.endpoint()
         streamer = TimeSeries(self.session, start_time, start_url,
-                              self.objects_name, params=params)
+                              self.objects_name, params=params,
+                              **stream_args)
         for event in streamer:
             yield event
 
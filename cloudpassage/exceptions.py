@@ -157,6 +157,41 @@ class CloudPassageRateLimit(CloudPassageBaseException):
     """
 
 
+class CloudPassageCircuitOpen(CloudPassageBaseException):
+    """This exception indicates that a request was not sent, because \
+    the endpoint has been failing.
+
+    This is thrown by a :class:`cloudpassage.CircuitBreaker` while the
+    circuit for the endpoint is open.
+
+    Args:
+        error_msg (str): Message describing the error
+
+    Keyword Args:
+        code (int): Numeric ID for error
+
+    Attributes:
+        msg (str)
+
+    """
+
+
+class CloudPassageTimeout(CloudPassageBaseException):
+    """This exception indicates that a request timed out, or that an \
+    operation ran past its deadline.
+
+    Args:
+        error_msg (str): Message describing the error
+
+    Keyword Args:
+        code (int): Numeric ID for error
+
+    Attributes:
+        msg (str)
+
+    """
+
+
 class CloudPassageGeneral(CloudPassageBaseException):
     """This is thrown when a more specific exception type is unavailable.
 
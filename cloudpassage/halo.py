@@ -4,17 +4,28 @@ Manage session configuration for interacting with the CloudPassage Halo API.
 """
 
 import base64
-import json
+import logging
 import sys
 import threading
 import time
+import weakref
 from .utility import Utility as utility
+from .circuit_breaker import CircuitBreaker
+from .json_codec import JsonCodec
+from .rate_limiter import RateLimiter
+from .rate_limiter import TokenBucket
+from .retry import HaloRetry
+from .token_cache import TokenCache
 import cloudpassage.sanity as sanity
 from .exceptions import CloudPassageAuthentication
+from .exceptions import CloudPassageTimeout
 from .exceptions import CloudPassageValidation
 from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 import requests
+from urllib3.exceptions import ConnectTimeoutError
+from urllib3.exceptions import ReadTimeoutError
+
+logger = logging.getLogger(__name__)
 
 
 class HaloSession(object):
@@ -42,6 +53,56 @@ class HaloSession(object):
             to pass this kwarg in.
         integration_string (str): If set, this will cause the user agent
             string to include an identifier for the integration being used.
+        background_token_refresh (bool): If True (default), a background
+            thread refreshes the OAuth token shortly before it expires, so
+            requests don't stall on reauthentication.  The token is only
+            refreshed if the session has been used since the last refresh,
+            and the thread does not keep the session alive.  Call
+            :meth:`close` to stop it.
+        pool_maxsize (int): Maximum number of connections kept open to the
+            API.  Set this to at least the number of threads sharing the
+            session.  Defaults to 10, and grows automatically when the SDK's
+            own multi-threaded helpers need more.
+        pool_block (bool): If True, threads wait for a free connection when
+            the pool is exhausted, instead of opening (and then discarding)
+            an extra one.  Defaults to False.
+        keep_alive (bool): If False, connections are closed after each
+            request.  Defaults to True.
+        token_cache (:class:`cloudpassage.TokenCache` or str): Cache, or
+            path to cache file, for sharing OAuth tokens with other
+            processes using the same API key.  If the cache cannot be
+            read or written, tokens are requested without it.  Disabled by
+            default.
+        rate_limit (float): Maximum requests per second, shared by all
+            threads using this session.  Unlimited by default.
+        endpoint_rate_limits (dict): Maximum requests per second for
+            specific endpoints, keyed by URL path prefix.  Example:
+            ``{"/v1/events": 2, "/v1/servers": 5}``
+        rate_limiter (:class:`cloudpassage.RateLimiter`): Use this limiter
+            instead of building one from ``rate_limit`` and
+            ``endpoint_rate_limits``.  Useful for sharing one budget between
+            sessions.
+        retry_budget (int): Maximum number of retries per minute, shared by
+            all threads using this session.  Once it is spent, failed
+            requests are not retried until it refills.  Defaults to 60.  Set
+            to None for no limit.
+        circuit_breaker_threshold (int): If set, requests to an endpoint
+            fail fast with :class:`cloudpassage.CloudPassageCircuitOpen`
+            after this many consecutive 5xx responses or connection errors,
+            until a probe request succeeds.  Disabled by default.
+        circuit_breaker_timeout (float): Seconds to wait before probing a
+            failing endpoint.  Defaults to 30.
+        connect_timeout (float): Seconds to wait for a connection to the
+            API.  Defaults to 10.
+        read_timeout (float): Seconds to wait for the API to send data,
+            once connected.  Defaults to 120.
+        json_codec (:class:`cloudpassage.JsonCodec`): Codec for request and
+            response bodies.  Defaults to the fastest JSON library
+            installed.  See :meth:`cloudpassage.JsonCodec.best_available`.
+        circuit_breaker (:class:`cloudpassage.CircuitBreaker`): Use this
+            breaker instead of building one from
+            ``circuit_breaker_threshold``.  Useful for sharing one breaker
+            between sessions.
 
     """
     # Max number of retries for any reason
@@ -49,6 +110,19 @@ class HaloSession(object):
     # Always retry on these statuses, within the requests session.
     # We retry for auth failure (401) within the SDK code. See try_wrapper().
     retry_statuses = [429, 500, 502, 503, 504]
+    # Minimum backoff between retries, in seconds.  Backoff grows with
+    # decorrelated jitter from here.  See HaloRetry.
+    backoff_factor = 1
+    # Retries per minute, across all threads.
+    retry_budget = 60
+    # Default timeouts for each request, in seconds.
+    connect_timeout = 10
+    read_timeout = 120
+    # Refresh the OAuth token this many seconds before it expires.
+    token_refresh_margin = 60
+    # Exceptions which count as failures in the circuit breaker.
+    connection_errors = (requests.exceptions.ConnectionError,
+                         requests.exceptions.Timeout)
 
     # pylint: disable=too-many-instance-attributes
 
@@ -64,9 +138,22 @@ class HaloSession(object):
         self.secret = apisecret
         self.auth_token = None
         self.auth_scope = None
+        self.auth_token_refresh_at = None
+        self.auth_token_expires_at = None
+        self.auth_refresh_timer = None
+        self.used_since_refresh = False
+        self.token_cache = None
+        self.background_token_refresh = True
         self.proxy_host = None
         self.proxy_port = None
         self.requests_ca_bundle = None
+        self.rate_limiter = None
+        self.pool_maxsize = 10
+        self.pool_block = False
+        self.keep_alive = True
+        self.retry_bucket = None
+        self.circuit_breaker = None
+        self.json_codec = None
         self.lock = threading.RLock()
         # Override defaults for proxy
         if "proxy_host" in kwargs:
@@ -83,6 +170,28 @@ class HaloSession(object):
             self.api_port = kwargs["api_port"]
         if "integration_string" in kwargs:
             self.integration_string = kwargs["integration_string"]
+        # Override defaults for connection pool
+        if "pool_maxsize" in kwargs:
+            self.pool_maxsize = kwargs["pool_maxsize"]
+        if "pool_block" in kwargs:
+            self.pool_block = kwargs["pool_block"]
+        if "keep_alive" in kwargs:
+            self.keep_alive = kwargs["keep_alive"]
+        if "connect_timeout" in kwargs:
+            self.connect_timeout = kwargs["connect_timeout"]
+        if "read_timeout" in kwargs:
+            self.read_timeout = kwargs["read_timeout"]
+        if "retry_budget" in kwargs:
+            self.retry_budget = kwargs["retry_budget"]
+        if self.retry_budget:
+            self.retry_bucket = TokenBucket(self.retry_budget / 60.0,
+                                            burst=self.retry_budget)
+        if "token_cache" in kwargs:
+            self.token_cache = kwargs["token_cache"]
+            if sanity.is_it_a_string(self.token_cache):
+                self.token_cache = TokenCache(self.token_cache)
+        if "background_token_refresh" in kwargs:
+            self.background_token_refresh = kwargs["background_token_refresh"]
         if "user_agent" in kwargs:
             self.user_agent = kwargs["user_agent"]
         else:
@@ -90,6 +199,24 @@ class HaloSession(object):
         if self.integration_string != '':
             self.user_agent = "%s %s" % (self.integration_string,
                                          self.user_agent)
+        # Set up client-side rate limiting
+        if "rate_limiter" in kwargs:
+            self.rate_limiter = kwargs["rate_limiter"]
+        elif "rate_limit" in kwargs or "endpoint_rate_limits" in kwargs:
+            self.rate_limiter = RateLimiter(
+                kwargs.get("rate_limit"),
+                endpoint_rates=kwargs.get("endpoint_rate_limits", {}))
+        if "json_codec" in kwargs:
+            self.json_codec = kwargs["json_codec"]
+        else:
+            self.json_codec = JsonCodec.best_available()
+        # Set up circuit breaker
+        if "circuit_breaker" in kwargs:
+            self.circuit_breaker = kwargs["circuit_breaker"]
+        elif "circuit_breaker_threshold" in kwargs:
+            self.circuit_breaker = CircuitBreaker(
+                kwargs["circuit_breaker_threshold"],
+                kwargs.get("circuit_breaker_timeout", 30))
         # Set up session and connection pool
         self.build_client()
         return None
@@ -97,20 +224,52 @@ class HaloSession(object):
     def build_client(self):
         """Build client object for class instantiation."""
         self.client = requests.Session()
-        self.retries = Retry(total=self.max_retries,
-                             status_forcelist=self.retry_statuses,
-                             backoff_factor=1)
-        self.halo_http_adapter = HTTPAdapter(pool_connections=1,
-                                             pool_maxsize=10,
-                                             max_retries=self.retries)
+        # Once retries run out, the last response is returned and raised
+        # as a CloudPassage exception, like any other error response.
+        self.retries = HaloRetry(total=self.max_retries,
+                                 status_forcelist=self.retry_statuses,
+                                 backoff_factor=self.backoff_factor,
+                                 budget=self.retry_bucket,
+                                 raise_on_status=False)
         self.session_mount = "https://%s:%s" % (self.api_host, self.api_port)
-        self.client.mount(self.session_mount, self.halo_http_adapter)
+        self.mount_http_adapter()
+        if not self.keep_alive:
+            self.client.headers["Connection"] = "close"
         if self.proxy_host:
             self.client.proxies.update(self.build_proxy_struct(self.proxy_host, self.proxy_port))
         if self.requests_ca_bundle:
             self.client.verify = self.requests_ca_bundle
         return None
 
+    def mount_http_adapter(self):
+        """Mount an HTTP adapter with the session's connection pool settings.
+
+        Connections in a previously-mounted adapter are released as they are
+        returned, and that adapter is discarded.
+        """
+        self.halo_http_adapter = HTTPAdapter(pool_connections=1,
+                                             pool_maxsize=self.pool_maxsize,
+                                             pool_block=self.pool_block,
+                                             max_retries=self.retries)
+        self.client.mount(self.session_mount, self.halo_http_adapter)
+        return None
+
+    def ensure_pool_capacity(self, size):
+        """Grow the connection pool to at least ``size`` connections.
+
+        The SDK's multi-threaded helpers call this with their thread count,
+        so that each thread can keep its connection (and TLS session) open
+        between requests.  The pool never shrinks.
+
+        Args:
+            size (int): Number of connections required.
+        """
+        with self.lock:
+            if size > self.pool_maxsize:
+                self.pool_maxsize = size
+                self.mount_http_adapter()
+        return None
+
     @classmethod
     def build_proxy_struct(cls, host, port):
         """Return a structure describing the environment's HTTP proxy settings.
@@ -140,19 +299,35 @@ class HaloSession(object):
             tuple: token, scope
         """
 
+        token, scope, _ = self.request_auth_token(endpoint, headers)
+        return token, scope
+
+    def request_auth_token(self, endpoint, headers):
+        """Returns the oauth token, scope, and lifetime.
+
+        Args:
+            endpoint (str): Full URL, including schema.
+            headers (dict): Dictionary, containing header with encoded
+                credentials.
+
+        Returns:
+            tuple: token, scope, expires_in.  expires_in is the token
+                lifetime in seconds, or None if not provided by the API.
+        """
+
         token = None
         scope = None
-        resp = self.client.post(endpoint, headers=headers)
+        expires_in = None
+        resp = self.client.post(endpoint, headers=headers,
+                                timeout=self.get_request_timeout())
         if resp.status_code == 200:
             auth_resp_json = resp.json()
             token = auth_resp_json["access_token"]
-            try:
-                scope = auth_resp_json["scope"]
-            except KeyError:
-                scope = None
+            scope = auth_resp_json.get("scope")
+            expires_in = auth_resp_json.get("expires_in")
         if resp.status_code == 401:
             token = "BAD"
-        return token, scope
+        return token, scope, expires_in
 
     def authenticate_client(self):
         """This method attempts to set an OAuth token
@@ -161,36 +336,210 @@ class HaloSession(object):
         as well as the proxy settings (if used) to authenticate
         this HaloSession instance.
 
+        If the session has a token cache, a valid token from the cache is
+        used instead, and newly-requested tokens are written to the cache.
+        If the cache cannot be used, because of an I/O error, the error is
+        logged and the session authenticates without it.
+
         """
 
+        with self.lock:
+            if self.token_cache is None:
+                success = self.fetch_auth_token()
+            else:
+                stale_token = self.auth_token
+                try:
+                    success = self.authenticate_with_cache()
+                except (IOError, OSError) as exc:
+                    logger.warning("Token cache %s unusable, authenticating "
+                                   "without it: %s", self.token_cache.path,
+                                   exc)
+                    success = (self.auth_token is not None and
+                               self.auth_token != stale_token)
+                    if not success:
+                        success = self.fetch_auth_token()
+            self.client.headers.update(self.build_header())
+        return success
+
+    def authenticate_with_cache(self):
+        """Set the OAuth token from the token cache, or fetch and cache one.
+
+        Returns:
+            bool: True if a token was set.
+
+        Raises:
+            IOError, OSError: The cache could not be locked or written.
+        """
+        with self.token_cache.lock():
+            success = self.load_cached_auth_token()
+            if not success:
+                success = self.fetch_auth_token()
+            if success:
+                self.token_cache.put(self.key_id, self.api_host,
+                                     self.auth_token, self.auth_scope,
+                                     self.auth_token_expires_at)
+        return success
+
+    def fetch_auth_token(self):
+        """Request a new OAuth token from the API, and set it.
+
+        Returns:
+            bool: True if a token was set.
+        """
         success = False
-        prefix = self.build_endpoint_prefix()
-        endpoint = prefix + "/oauth/access_token?grant_type=client_credentials"
-        combined = "{key_id}:{secret}".format(key_id=self.key_id,
-                                              secret=self.secret)
-        if sys.version_info < (3, 0):
-            encoded = base64.b64encode(bytes(combined))
-        else:
-            encoded = base64.b64encode(bytes(combined, 'utf8')).decode()
-        auth_header = "Basic {}".format(encoded)
-        headers = {"Authorization": auth_header}
+        endpoint, headers = self.build_auth_request()
         max_tries = 5
         for _ in range(max_tries):
-            token, scope = self.get_auth_token(endpoint, headers)
+            token, scope, expires_in = self.request_auth_token(endpoint,
+                                                               headers)
             if token == "BAD":
                 # Add message for IP restrictions
                 exc_msg = "Invalid credentials- can not obtain session token."
                 raise CloudPassageAuthentication(exc_msg)
             if token is not None:
-                self.auth_token = token
-                self.auth_scope = scope
+                self.set_auth_token(token, scope, expires_in)
                 success = True
                 break
             else:
                 time.sleep(1)
-        self.client.headers.update(self.build_header())
         return success
 
+    def load_cached_auth_token(self):
+        """Set the OAuth token from the token cache, if possible.
+
+        The cached token is ignored if it's the one this session is already
+        using, as that one is expiring or was rejected.
+
+        Returns:
+            bool: True if a token was set.
+        """
+        cached = self.token_cache.get(self.key_id, self.api_host,
+                                      min_ttl=self.token_refresh_margin)
+        if cached is None or cached[0] == self.auth_token:
+            return False
+        token, scope, expires_at = cached
+        expires_in = None
+        if expires_at is not None:
+            expires_in = expires_at - time.time()
+        self.set_auth_token(token, scope, expires_in)
+        return True
+
+    def set_auth_token(self, token, scope, expires_in):
+        """Set the OAuth token, and schedule its refresh.
+
+        Args:
+            token (str): OAuth token.
+            scope (str): OAuth token scope.
+            expires_in (int): Token lifetime in seconds.  None if unknown.
+        """
+        self.auth_token = token
+        self.auth_scope = scope
+        self.used_since_refresh = False
+        self.auth_token_refresh_at = None
+        self.auth_token_expires_at = None
+        if expires_in:
+            self.auth_token_expires_at = time.time() + expires_in
+            margin = min(self.token_refresh_margin, expires_in / 2.0)
+            self.auth_token_refresh_at = time.time() + expires_in - margin
+            if self.background_token_refresh:
+                self.schedule_token_refresh(expires_in - margin)
+        return None
+
+    def schedule_token_refresh(self, delay):
+        """Refresh the OAuth token in a background thread after ``delay``.
+
+        Any previously-scheduled refresh is cancelled.  The timer only holds
+        a weak reference to the session, so an abandoned session can still
+        be garbage-collected.
+        """
+        if self.auth_refresh_timer is not None:
+            self.auth_refresh_timer.cancel()
+        self.auth_refresh_timer = threading.Timer(delay,
+                                                  self.background_refresh,
+                                                  (weakref.ref(self),
+                                                   self.auth_token))
+        self.auth_refresh_timer.daemon = True
+        self.auth_refresh_timer.start()
+        return None
+
+    @classmethod
+    def background_refresh(cls, session_ref, stale_token):
+        """Refresh the OAuth token from the background timer.
+
+        Nothing is done if the session is gone, or has not made a request
+        since its token was last set.  An idle session's token is refreshed
+        by its next request instead, which also restarts the timer.
+
+        If this fails, the token is marked for refresh, and the next request
+        will try again before it is sent.
+
+        Args:
+            session_ref (weakref.ref): Reference to the session.
+            stale_token (str): Token in use when the refresh was scheduled.
+        """
+        session = session_ref()
+        if session is None or not session.used_since_refresh:
+            return None
+        try:
+            session.refresh_auth(stale_token)
+        except Exception:  # pylint: disable=broad-except
+            session.auth_token_refresh_at = time.time()
+        return None
+
+    def close(self):
+        """Stop the background token refresh, and close open connections.
+
+        The session may still be used afterwards, but its token will only
+        be refreshed as requests are made.
+        """
+        with self.lock:
+            self.background_token_refresh = False
+            if self.auth_refresh_timer is not None:
+                self.auth_refresh_timer.cancel()
+                self.auth_refresh_timer = None
+        self.client.close()
+        return None
+
+    def token_expiring(self):
+        """Return True if the OAuth token is due to be refreshed."""
+        if self.auth_token_refresh_at is None:
+            return False
+        return time.time() >= self.auth_token_refresh_at
+
+    def refresh_auth(self, stale_token):
+        """Authenticate, unless another thread has already replaced the token.
+
+        Threads which find the token expired or rejected all call this
+        method, but only the first one through ``self.lock`` requests a new
+        token.  The rest find the token already replaced and return.
+
+        Args:
+            stale_token (str): Token in use when the caller decided to
+                authenticate.  None if the session has no token yet.
+        """
+        with self.lock:
+            if self.auth_token is None or self.auth_token == stale_token:
+                self.authenticate_client()
+        return None
+
+    def build_auth_request(self):
+        """Return the URL and headers used for requesting an OAuth token.
+
+        Returns:
+            tuple: endpoint, headers
+        """
+        prefix = self.build_endpoint_prefix()
+        endpoint = prefix + "/oauth/access_token?grant_type=client_credentials"
+        combined = "{key_id}:{secret}".format(key_id=self.key_id,
+                                              secret=self.secret)
+        if sys.version_info < (3, 0):
+            encoded = base64.b64encode(bytes(combined))
+        else:
+            encoded = base64.b64encode(bytes(combined, 'utf8')).decode()
+        auth_header = "Basic {}".format(encoded)
+        headers = {"Authorization": auth_header}
+        return endpoint, headers
+
     def build_endpoint_prefix(self):
         """This constructs everything to the left of the file path in the URL.
 
@@ -213,7 +562,7 @@ class HaloSession(object):
                   "Accept-Encoding": "gzip"}
         return header
 
-    def interact(self, verb, endpoint, params=None, reqbody=None):
+    def interact(self, verb, endpoint, params=None, reqbody=None, **kwargs):
         """This method allows us to wrap common Halo interaction functionality.
 
         Most exceptions will be caught and validated here, and if retries fail,
@@ -227,6 +576,16 @@ class HaloSession(object):
             reqbody (dict): Dictionary to be converted to JSON for insertion
                 as payload for request.
 
+        Keyword Args:
+            timeout (float or tuple): Timeout for this request, in seconds,
+                overriding the session's ``connect_timeout`` and
+                ``read_timeout``.  A tuple sets (connect, read) separately.
+            deadline (float): UNIX timestamp by which this request must
+                complete.  Timeouts are shortened to fit, and
+                :class:`cloudpassage.CloudPassageTimeout` is raised if the
+                deadline has already passed.  Operations spanning several
+                requests pass the same deadline to each one.
+
         Returns:
             response object
         """
@@ -234,16 +593,19 @@ class HaloSession(object):
         url = "%s%s" % (self.build_endpoint_prefix(), endpoint)
         # Set up for try/retry
         success = False
+        self.check_deadline(url, kwargs.get("deadline"))
         # If we've not authenticated the session, we do it now
         if self.auth_token is None:
-            self.authenticate_client()
+            self.refresh_auth(None)
+        elif self.token_expiring():
+            self.refresh_auth(self.auth_token)
         success, response, exception = self.try_wrapper(verb, url, params,
-                                                        reqbody)
+                                                        reqbody, **kwargs)
         if success:
             return response
         raise exception
 
-    def try_wrapper(self, verb, url, params, reqbody):
+    def try_wrapper(self, verb, url, params, reqbody, **kwargs):
         """Wraps tries.
 
         Args:
@@ -251,6 +613,10 @@ class HaloSession(object):
             params (list of dict): URL params.
             reqbody (dict): Request body.
 
+        Keyword Args:
+            timeout (float or tuple): See :meth:`interact`.
+            deadline (float): See :meth:`interact`.
+
         Returns:
             success (bool)
             response (requests.response)
@@ -264,18 +630,116 @@ class HaloSession(object):
         if verb not in verb_mapping:
             raise ValueError("Invalid HTTP verb for Halo API: %s" % verb)
         if self.auth_token is None:
-            self.authenticate_client()
+            self.refresh_auth(None)
+        token = self.auth_token
         success, response, exception = self.get_response(verb_mapping[verb],
                                                          verb, url, params,
-                                                         reqbody)
+                                                         reqbody, **kwargs)
         if response.status_code == 401:  # Try to reauth once.
-            self.authenticate_client()
+            self.refresh_auth(token)
             success, response, exception = self.get_response(verb_mapping[verb],  # NOQA
                                                              verb, url, params,
-                                                             reqbody)
+                                                             reqbody, **kwargs)
         return success, response, exception
 
-    def get_response(self, client_method, verb, url, params, reqbody):
+    def decode_json(self, response):
+        """Decode a response body with the session's JSON codec.
+
+        Args:
+            response (requests.Response): Response to decode.
+
+        Returns:
+            object: Decoded body.
+
+        Raises:
+            ValueError: If the body is not valid JSON.
+        """
+        return self.json_codec.loads(response.content)
+
+    def record_outcome(self, url, response, exception=None):
+        """Record a request's outcome in the circuit breaker, if enabled.
+
+        A 5xx response, or one of ``connection_errors``, is a failure.  Any
+        other response is a success.  Other exceptions, like running out of
+        retries for rate-limited requests, are not recorded.
+
+        Args:
+            url (str): Complete URL for request.
+            response (object): Response, or None if the request raised an
+                exception.
+            exception (Exception): Exception raised by the request, if any.
+
+        Returns:
+            bool: True if an outcome was recorded.
+        """
+        if self.circuit_breaker is None:
+            return False
+        if response is not None:
+            if response.status_code >= 500:
+                self.circuit_breaker.record_failure(url)
+            else:
+                self.circuit_breaker.record_success(url)
+        elif isinstance(exception, self.connection_errors):
+            self.circuit_breaker.record_failure(url)
+        else:
+            return False
+        return True
+
+    def check_deadline(self, url, deadline):
+        """Raise CloudPassageTimeout if ``deadline`` has passed.
+
+        Args:
+            url (str): URL of the request about to be made.
+            deadline (float): UNIX timestamp, or None for no deadline.
+        """
+        if deadline is not None and time.time() >= deadline:
+            raise CloudPassageTimeout("Deadline passed before request to %s"
+                                      % url)
+        return None
+
+    def get_request_timeout(self, timeout=None, deadline=None):
+        """Return the (connect, read) timeout for a request.
+
+        Args:
+            timeout (float or tuple): Override for the session's timeouts.
+            deadline (float): UNIX timestamp.  Neither timeout will extend
+                past it.
+
+        Returns:
+            tuple: Connect and read timeouts, in seconds.
+        """
+        if timeout is None:
+            timeout = (self.connect_timeout, self.read_timeout)
+        elif not isinstance(timeout, tuple):
+            timeout = (timeout, timeout)
+        if deadline is not None:
+            remaining = max(deadline - time.time(), 0.001)
+            timeout = tuple([remaining if limit is None else
+                             min(limit, remaining) for limit in timeout])
+        return timeout
+
+    @classmethod
+    def timed_out(cls, exc, deadline=None):
+        """Return True if a request exception was caused by a timeout.
+
+        Once retries are exhausted, requests reports a timeout as a
+        ``ConnectionError`` or ``RetryError`` wrapping urllib3's
+        ``MaxRetryError``.  Any failure after ``deadline`` is also a timeout,
+        as the deadline is what stopped the retries.
+
+        Args:
+            exc (requests.exceptions.RequestException): Exception raised.
+            deadline (float): UNIX timestamp, or None for no deadline.
+        """
+        if isinstance(exc, requests.exceptions.Timeout):
+            return True
+        if deadline is not None and time.time() >= deadline:
+            return True
+        reason = getattr(exc.args[0], "reason", None) if exc.args else None
+        return isinstance(reason, (ReadTimeoutError, ConnectTimeoutError))
+
+    def get_response(self, client_method, verb, url, params, reqbody,
+                     **kwargs):
         """Base method for getting response from Halo API.
 
         Args:
@@ -287,15 +751,50 @@ class HaloSession(object):
             params (list): URL params in a list of dictionaries.
             reqbody (dict): Body of put/post request
 
+        Keyword Args:
+            timeout (float or tuple): See :meth:`interact`.
+            deadline (float): See :meth:`interact`.
+
         Returns:
             success (bool)
             response (requests.response)
             exception (Exception)
         """
-        if verb in ['get', 'delete']:
-            response = client_method(url, params=params)
-        else:
-            response = client_method(url, data=json.dumps(reqbody))
+        deadline = kwargs.get("deadline")
+        self.used_since_refresh = True
+        if self.rate_limiter is not None:
+            self.rate_limiter.wait(url)
+        self.check_deadline(url, deadline)
+        timeout = self.get_request_timeout(kwargs.get("timeout"), deadline)
+        probing = False
+        if self.circuit_breaker is not None:
+            probing = self.circuit_breaker.before_request(url)
+        response = None
+        recorded = False
+        try:
+            try:
+                with HaloRetry.request_deadline(deadline):
+                    if verb in ['get', 'delete']:
+                        response = client_method(url, params=params,
+                                                 timeout=timeout)
+                    else:
+                        response = client_method(
+                            url, data=self.json_codec.dumps(reqbody),
+                            timeout=timeout)
+            except (requests.exceptions.Timeout,
+                    requests.exceptions.ConnectionError,
+                    requests.exceptions.RetryError) as exc:
+                recorded = self.record_outcome(url, None, exc)
+                if self.timed_out(exc, deadline):
+                    raise CloudPassageTimeout("Request to %s timed out: %s"
+                                              % (url, exc))
+                raise
+            recorded = self.record_outcome(url, response)
+        finally:
+            # A probe with no recorded outcome must not hold the circuit
+            # half-open for good.
+            if probing and not recorded:
+                self.circuit_breaker.release_probe(url)
         success, exception = utility.parse_status(url, response.status_code,
                                                   response.text)
         return success, response, exception
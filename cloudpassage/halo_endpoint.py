@@ -1,19 +1,33 @@
 """HaloEndpoint class"""
 
+import sys
 import cloudpassage.sanity as sanity
 from .utility import Utility as utility
 from .http_helper import HttpHelper
+from .bulk_executor import BulkExecutor
+if sys.version_info >= (3, 6):
+    from .async_halo import AsyncHttpHelper
 
 
 class HaloEndpoint(object):
-    """Base class inherited by other specific HaloEndpoint classes."""
+    """Base class inherited by other specific HaloEndpoint classes.
+
+    Keyword args:
+        endpoint_version (int): Endpoint version override.
+        prefetch (int): Number of threads used by :meth:`list_all` for
+            retrieving pages concurrently.  Defaults to 0 (sequential).
+    """
 
     # default_endpoint_version = 1 # deprecated
     default_endpoint_version = 2
+    # URL parameter for server-side field selection, for endpoints which
+    # support it.  If None, fields are filtered client-side only.
+    fields_param = None
 
     def __init__(self, session, **kwargs):
         self.session = session
         self.max_pages = 100
+        self.prefetch = kwargs.get("prefetch", 0)
         self.set_endpoint_version(kwargs)
 
     def set_endpoint_version(self, kwargs):
@@ -45,6 +59,17 @@ class HaloEndpoint(object):
     def list_all(self, **kwargs):
         """Lists all objects of this type.
 
+        Keyword Args:
+            stream (bool): If True, return a generator which yields objects
+                page by page, instead of a list.  Defaults to False.
+            fields (list): Keys to keep in each object, for example
+                ``["id", "hostname", "state"]``.  Where the endpoint
+                supports it, the field list is sent to the API.  Otherwise
+                (and in any case) other keys are dropped from each page as
+                it is parsed.
+            prefetch (int): Number of threads retrieving pages
+                concurrently.  Defaults to the endpoint's ``prefetch``.
+
         Returns:
             list: List of objects (represented as dictionary-type objects)
 
@@ -53,13 +78,119 @@ class HaloEndpoint(object):
 
         """
 
+        return self.list_paginated(self.pagination_key(), self.max_pages,
+                                   kwargs)
+
+    def list_paginated(self, key, max_pages, kwargs):
+        """Return the objects listed by :meth:`list_all`.
+
+        The ``stream``, ``fields`` and ``prefetch`` keyword arguments of
+        :meth:`list_all` are taken from ``kwargs``.  The rest are sent as
+        query parameters.
+
+        Args:
+            key (str): Key in each page for the list of objects.
+            max_pages (int): Maximum number of pages to retrieve.
+            kwargs (dict): Keyword arguments passed to :meth:`list_all`.
+
+        Returns:
+            list or generator: Objects, as a list, or as a generator if
+                ``stream`` is True.
+        """
+        stream = kwargs.pop("stream", False)
+        fields = kwargs.pop("fields", None)
+        prefetch = kwargs.pop("prefetch", self.prefetch)
         request = HttpHelper(self.session)
-        params = utility.sanitize_url_params(kwargs)
-        response = request.get_paginated(self.endpoint(),
-                                         self.pagination_key(), self.max_pages,
-                                         params=params)
+        params = self.build_list_params(kwargs, fields)
+        if stream:
+            return request.iter_paginated(self.endpoint(), key, max_pages,
+                                          params=params, prefetch=prefetch,
+                                          fields=fields)
+        response = request.get_paginated(self.endpoint(), key, max_pages,
+                                         params=params, prefetch=prefetch,
+                                         fields=fields)
         return response
 
+    def build_list_params(self, kwargs, fields):
+        """Return URL params for :meth:`list_all`.
+
+        Args:
+            kwargs (dict): Query parameters.
+            fields (list): Fields to select, or None.
+
+        Returns:
+            dict: Sanitized URL params, including the server-side field
+                selection if this endpoint supports it.
+        """
+        params = utility.sanitize_url_params(kwargs)
+        if fields and self.fields_param is not None:
+            params[self.fields_param] = ",".join(fields)
+        return params
+
+    def list_all_async(self, **kwargs):
+        """Awaitable version of :meth:`list_all`.
+
+        Requires the endpoint object to be instantiated with a
+        :class:`cloudpassage.AsyncHaloSession`.
+
+        Returns:
+            coroutine: Resolves to a list of objects.
+        """
+
+        fields = kwargs.pop("fields", None)
+        request = AsyncHttpHelper(self.session)
+        params = self.build_list_params(kwargs, fields)
+        return request.get_paginated(self.endpoint(), self.pagination_key(),
+                                     self.max_pages, params=params,
+                                     prefetch=self.prefetch, fields=fields)
+
+    def describe_async(self, object_id):
+        """Awaitable version of :meth:`describe`.
+
+        Requires the endpoint object to be instantiated with a
+        :class:`cloudpassage.AsyncHaloSession`.
+
+        Returns:
+            coroutine: Resolves to a dictionary object representing the
+                entire object.
+        """
+
+        request = AsyncHttpHelper(self.session)
+        describe_endpoint = "%s/%s" % (self.endpoint(), object_id)
+        return request.get_object(describe_endpoint, self.object_key())
+
+    def fan_out(self, method, object_ids, concurrency=10, **kwargs):
+        """Call a per-object method concurrently for many objects.
+
+        Example::
+
+            server = cloudpassage.Server(session)
+            results = server.fan_out("list_packages", server_ids,
+                                     concurrency=20)
+            for server_id, packages, exc in results:
+                ...
+
+        Args:
+            method (str or callable): Name of a method of this object which
+                takes an object ID as its first argument, like
+                ``"describe"`` or ``"list_packages"``, or any such callable.
+            object_ids (iterable): Object IDs.
+            concurrency (int): Number of calls to run at once.
+
+        Keyword Args:
+            Passed to each call of ``method``.
+
+        Returns:
+            generator: Yields (object_id, result, exception) tuples as calls
+                complete.  See :class:`cloudpassage.BulkExecutor`.
+        """
+
+        function = method
+        if sanity.is_it_a_string(method):
+            function = getattr(self, method)
+        executor = BulkExecutor(self.session, concurrency)
+        return executor.run(function, object_ids, **kwargs)
+
     def describe(self, object_id):
         """Get the detailed configuration by ID
 
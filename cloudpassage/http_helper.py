@@ -2,13 +2,16 @@
 GET / POST / PUT / DELETE requests against API.
 """
 
+import collections
+from multiprocessing.dummy import Pool as ThreadPool
 from .exceptions import CloudPassageValidation
 from .utility import Utility as utility
 # This is for Python 3 compatibility
 try:
-    from urllib.parse import urlsplit
+    from urllib.parse import urlsplit, parse_qsl, urlencode
 except ImportError:
-    from urlparse import urlsplit
+    from urlparse import urlsplit, parse_qsl
+    from urllib import urlencode
 
 
 class HttpHelper(object):
@@ -51,10 +54,36 @@ class HttpHelper(object):
                 doesn't operate like that.  Only the last instance of that
                 variable will be considered, and your results may be confusing.
                 So don't do it.  Dictionaries should be {str:str}.
+            timeout (float or tuple): Timeout for this request, in seconds.
+                See :meth:`cloudpassage.HaloSession.interact`.
+            deadline (float): UNIX timestamp by which this request must
+                complete.  See :meth:`cloudpassage.HaloSession.interact`.
         """
         params = kwargs["params"] if "params" in kwargs else None
-        response = self.connection.interact('get', endpoint, params)
-        return response.json()
+        response = self.connection.interact('get', endpoint, params,
+                                            **self.get_request_args(kwargs))
+        return self.decode_json(response)
+
+    def decode_json(self, response):
+        """Decode a response body, using the session's JSON codec if any.
+
+        Raises:
+            ValueError: If the body is not valid JSON.
+        """
+        decode_json = getattr(self.connection, "decode_json", None)
+        if decode_json is None:
+            return response.json()
+        return decode_json(response)
+
+    @classmethod
+    def get_request_args(cls, kwargs):
+        """Return the per-request keyword args present in ``kwargs``.
+
+        Only arguments which were actually passed are returned, so that
+        connection objects without timeout support keep working.
+        """
+        return dict([(k, kwargs[k]) for k in ["timeout", "deadline"]
+                     if kwargs.get(k) is not None])
 
     def get_paginated(self, endpoint, key, max_pages, **kwargs):
         """This method returns a concatenated list of objects
@@ -83,33 +112,155 @@ class HttpHelper(object):
                 doesn't operate like that.  Only the last instance of that
                 variable will be considered, and your results may be confusing.
                 So don't do it.  Dictionaries should be {str:str}.
+            prefetch (int): Number of threads to use for retrieving pages
+                concurrently.  If set, the remaining page URLs are derived
+                from the ``count`` reported in the first page, and are
+                retrieved in parallel.  Objects are still returned in page
+                order.  Defaults to 0 (follow ``pagination.next`` links one
+                at a time).
+            fields (list): Keys to keep in each object.  Other keys are
+                dropped as each page is parsed, so only the requested fields
+                are held in memory.  Defaults to keeping every key.
+            timeout (float or tuple): Timeout for each request, in seconds.
+            deadline (float): UNIX timestamp by which all pages must be
+                retrieved.  Every page request is given this deadline, and
+                :class:`cloudpassage.CloudPassageTimeout` is raised by the
+                first one which cannot complete in time.
+            first_page (dict): First page of results, if the caller has
+                already retrieved it (to check its ``count``, for instance).
+                Retrieval continues from its ``pagination.next`` link.
+
+        """
+
+        return list(self.iter_paginated(endpoint, key, max_pages, **kwargs))
+
+    def iter_paginated(self, endpoint, key, max_pages, **kwargs):
+        """This method yields objects from the Halo API, one page at a time.
+
+        It accepts the same arguments as :meth:`get_paginated`, but instead
+        of building the complete list before returning, it yields each object
+        as soon as the page containing it has been retrieved.  Only one page
+        is held in memory at a time, so consumers can begin processing
+        results while the rest of the pages are still being retrieved.
+
+        Args:
+            endpoint (str): Path for initial query
+            key (str): The key in the response containing the objects of
+                interest.
+            max_pages (int): Maximum number of pages to retrieve.  300 max.
+
+        Keyword Args:
+            params (dict): URL parameters for the initial query.  See
+                :meth:`get_paginated` for caveats.
+            prefetch (int): Number of threads to use for retrieving pages
+                concurrently.  See :meth:`get_paginated`.
+            fields (list): Keys to keep in each object.  See
+                :meth:`get_paginated`.
+            timeout (float or tuple): Timeout for each request, in seconds.
+            deadline (float): UNIX timestamp by which all pages must be
+                retrieved.  See :meth:`get_paginated`.
+            first_page (dict): First page of results, already retrieved.
+                See :meth:`get_paginated`.
+
+        Yields:
+            dict: One object from the key of interest in each page.
 
         """
 
         max_pages_valid, pages_invalid_msg = utility.verify_pages(max_pages)
         if not max_pages_valid:
             raise CloudPassageValidation(pages_invalid_msg)
-        more_pages = False
-        response_accumulator = []
-        if "params" in kwargs and kwargs["params"] != {}:
-            initial_page = self.get(endpoint, params=kwargs["params"])
+        request_args = self.get_request_args(kwargs)
+        if "first_page" in kwargs:
+            page = kwargs["first_page"]
+        elif "params" in kwargs and kwargs["params"] != {}:
+            page = self.get(endpoint, params=kwargs["params"], **request_args)
         else:
-            initial_page = self.get(endpoint)
-        response, next_page = self.process_page(initial_page, key)
-        response_accumulator.extend(response)
+            page = self.get(endpoint, **request_args)
         pages_parsed = 1
-        if next_page is not None:
-            more_pages = True
-        while more_pages:
-            page = self.get(next_page)
-            response, next_page = self.process_page(page, key)
-            response_accumulator.extend(response)
+        prefetch = kwargs.get("prefetch", 0)
+        fields = kwargs.get("fields")
+        while True:
+            response, next_page = self.process_page(page, key, fields)
+            for item in response:
+                yield item
+            if next_page is None or pages_parsed >= max_pages:
+                return
+            if prefetch and pages_parsed == 1 and "count" in page:
+                page_urls = self.get_remaining_page_paths(page, next_page,
+                                                          len(response),
+                                                          max_pages)
+                for prefetched in self.prefetch_pages(page_urls, prefetch,
+                                                      **request_args):
+                    for item in self.process_page(prefetched, key,
+                                                  fields)[0]:
+                        yield item
+                return
+            page = self.get(next_page, **request_args)
             pages_parsed += 1
-            if next_page is None:
-                more_pages = False
-            if pages_parsed >= max_pages:
-                more_pages = False
-        return response_accumulator
+
+    def prefetch_pages(self, page_paths, threads, **kwargs):
+        """Retrieve pages concurrently, yielding them in the original order.
+
+        At most ``threads * 2`` pages are requested ahead of the consumer,
+        which keeps memory bounded if the consumer is slower than the API.
+
+        Args:
+            page_paths (list): Paths, including URL params, for each page.
+            threads (int): Number of pages to retrieve concurrently.
+
+        Keyword Args:
+            timeout (float or tuple): Timeout for each request, in seconds.
+            deadline (float): UNIX timestamp by which all pages must be
+                retrieved.
+
+        Yields:
+            dict: Page contents as dict, in the same order as page_paths.
+        """
+        utility.ensure_pool_capacity(self.connection, threads)
+        pool = ThreadPool(threads)
+        in_flight = collections.deque()
+        try:
+            for page_path in page_paths:
+                if len(in_flight) >= threads * 2:
+                    yield in_flight.popleft().get()
+                in_flight.append(pool.apply_async(self.get, (page_path,),
+                                                  kwargs))
+            while in_flight:
+                yield in_flight.popleft().get()
+        finally:
+            pool.terminate()
+            pool.join()
+
+    @classmethod
+    def get_remaining_page_paths(cls, first_page, next_page, per_page,
+                                 max_pages):
+        """Derive the paths for pages 2-N from the first page of results.
+
+        Args:
+            first_page (dict): First page of results, containing ``count``.
+            next_page (str): Path to the second page, as returned by
+                :meth:`get_next_page_path`.
+            per_page (int): Number of objects in the first page. Overridden
+                by the ``per_page`` URL parameter in ``next_page``, if present.
+            max_pages (int): Maximum number of pages, including the first.
+
+        Returns:
+            list: Paths, including URL params, for all remaining pages.
+        """
+        parts = urlsplit(next_page)
+        query = dict(parse_qsl(parts.query))
+        if "per_page" in query:
+            per_page = int(query["per_page"])
+        if per_page < 1:
+            return [next_page]
+        total_pages = -(-int(first_page["count"]) // per_page)
+        last_page = min(total_pages, max_pages)
+        page_paths = []
+        for page_number in range(2, last_page + 1):
+            query["page"] = page_number
+            page_paths.append("{}?{}".format(parts.path, urlencode(query)))
+        return page_paths
 
     @classmethod
     def get_next_page_path(cls, page):
@@ -123,19 +274,36 @@ class HttpHelper(object):
         return next_page
 
     @classmethod
-    def process_page(cls, page, key):
-        """Page goes in, list data comes out."""
+    def process_page(cls, page, key, fields=None):
+        """Page goes in, list data comes out.
+
+        Args:
+            page (dict): Page of results.
+            key (str): Key in ``page`` which contains the objects.
+            fields (list): If set, only these keys are kept in each object.
+
+        Returns:
+            tuple: List of objects, and path to the next page (or None).
+        """
         response_accumulator = []
         if key not in page:
             fail_msg = ("Requested key %s not found in page"
                         % key)
             raise CloudPassageValidation(fail_msg)
         for k in page[key]:
+            if fields is not None:
+                k = cls.project_fields(k, fields)
             response_accumulator.append(k)
         next_page = cls.get_next_page_path(page)
         return response_accumulator, next_page
 
-    def post(self, endpoint, reqbody):
+    @classmethod
+    def project_fields(cls, item, fields):
+        """Return a copy of ``item`` with only the keys in ``fields``."""
+        return dict([(field, item[field]) for field in fields
+                     if field in item])
+
+    def post(self, endpoint, reqbody, **kwargs):
         """This method performs a POST against Halo's API.
 
         As with the GET method, it will attempt to (re)authenticate the session
@@ -151,10 +319,17 @@ class HttpHelper(object):
             reqbody (dict): Dictionary to be converted to JSON for insertion as
                 payload for request.
 
+        Keyword Args:
+            timeout (float or tuple): Timeout for this request, in seconds.
+            deadline (float): UNIX timestamp by which this request must
+                complete.
+
         """
-        return self.connection.interact("post", endpoint, None, reqbody).json()
+        response = self.connection.interact("post", endpoint, None, reqbody,
+                                            **self.get_request_args(kwargs))
+        return self.decode_json(response)
 
-    def put(self, endpoint, reqbody):
+    def put(self, endpoint, reqbody, **kwargs):
         """This method performs a PUT against Halo's API.
 
         As with the GET method, it will attempt to (re)authenticate the session
@@ -170,10 +345,16 @@ class HttpHelper(object):
             reqbody (dict): Dictionary to be converted to JSON for insertion
                 as payload for request.
 
+        Keyword Args:
+            timeout (float or tuple): Timeout for this request, in seconds.
+            deadline (float): UNIX timestamp by which this request must
+                complete.
+
         """
-        response = self.connection.interact("put", endpoint, None, reqbody)
+        response = self.connection.interact("put", endpoint, None, reqbody,
+                                            **self.get_request_args(kwargs))
         try:
-            return response.json()
+            return self.decode_json(response)
         except ValueError:  # Sometimes we don't get json back...
             return response.text
 
@@ -197,10 +378,17 @@ class HttpHelper(object):
         Args:
             endpoint (str): Path component of URL
 
+        Keyword Args:
+            params (dict): URL parameters.
+            timeout (float or tuple): Timeout for this request, in seconds.
+            deadline (float): UNIX timestamp by which this request must
+                complete.
+
         """
         params = kwargs["params"] if "params" in kwargs else None
-        response = self.connection.interact('delete', endpoint, params)
+        response = self.connection.interact('delete', endpoint, params,
+                                            **self.get_request_args(kwargs))
         try:
-            return response.json()
+            return self.decode_json(response)
         except ValueError:  # Sometimes we don't get json back...
             return response.text
@@ -1,7 +1,6 @@
 """Issue class"""
 
 import cloudpassage.sanity as sanity
-from .utility import Utility as utility
 from .http_helper import HttpHelper
 from .halo_endpoint import HaloEndpoint
 
@@ -57,18 +56,19 @@ class Issue(HaloEndpoint):
                 containing policy ids
             os_type (list or str): A list or comma-separated string
                 containing any of these: Linux, Windows
+            fields (list): Keys to keep in each object.  See
+                :meth:`cloudpassage.HaloEndpoint.list_all`.
+            stream (bool): If True, return a generator which yields issues
+                page by page, instead of a list.  Defaults to False.
+            prefetch (int): Number of threads retrieving pages
+                concurrently.  Defaults to the endpoint's ``prefetch``.
 
          Returns:
             list: List of dictionary objects describing issues
 
         """
 
-        session = self.session
-        request = HttpHelper(session)
-        params = utility.sanitize_url_params(kwargs)
-        issues = request.get_paginated(self.endpoint(), self.objects_name,
-                                       max_pages, params=params)
-        return issues
+        return self.list_paginated(self.objects_name, max_pages, kwargs)
 
     def describe(self, issue_id):
         """Get issue details by issue ID
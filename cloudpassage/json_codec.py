@@ -0,0 +1,69 @@
+"""JsonCodec class.
+
+Encode request bodies and decode response bodies for a HaloSession, using
+the fastest JSON library available.
+"""
+
+import json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+class JsonCodec(object):
+    """JSON encoder and decoder used by a :class:`cloudpassage.HaloSession`.
+
+    By default, a session uses :meth:`best_available`: orjson if it is
+    installed, otherwise ujson, otherwise the standard library.  Decoding
+    large pages (``/v3/issues``, ``/v1/servers/{id}/svm``) is several times
+    faster with either of the first two.  Install one with
+    ``pip install cloudpassage[fastjson]``.
+
+    To force a particular library, pass a codec to the session::
+
+        codec = cloudpassage.JsonCodec(json.loads, json.dumps, "json")
+        session = cloudpassage.HaloSession(key, secret, json_codec=codec)
+
+    Args:
+        loads (callable): Decode a str or bytes object.
+        dumps (callable): Encode an object, returning str or bytes.
+        name (str): Name of the library, for reference.
+    """
+
+    def __init__(self, loads=json.loads, dumps=json.dumps, name="json"):
+        self.name = name
+        self.fast_loads = loads
+        self.fast_dumps = dumps
+
+    @classmethod
+    def best_available(cls):
+        """Return a codec for the fastest JSON library installed."""
+        if orjson is not None:
+            return cls(orjson.loads, orjson.dumps, "orjson")
+        if ujson is not None:
+            return cls(ujson.loads, ujson.dumps, "ujson")
+        return cls()
+
+    def loads(self, data):
+        """Decode JSON from ``data``.
+
+        Raises:
+            ValueError: If ``data`` is not valid JSON.
+        """
+        return self.fast_loads(data)
+
+    def dumps(self, obj):
+        """Encode ``obj`` as JSON.
+
+        Objects the fast library cannot encode (like dicts with non-string
+        keys, for orjson) fall back to the standard library.
+        """
+        try:
+            return self.fast_dumps(obj)
+        except (TypeError, OverflowError):
+            return json.dumps(obj)
@@ -0,0 +1,174 @@
+"""MultiTimeSeries class"""
+
+import heapq
+import time
+from multiprocessing.dummy import Pool as ThreadPool
+from .exceptions import CloudPassageValidation
+from .utility import Utility as utility
+
+
+class MultiTimeSeries(object):
+    """Merge several time series into one generator.
+
+    Each source is a :class:`cloudpassage.TimeSeries`, configured as usual
+    with its own endpoint, parameters, and checkpoint store.  Instead of
+    running a thread pool and polling loop per source, this object polls
+    all sources together, retrieving every source's next batch of pages
+    through one shared thread pool.
+
+    Each source's share of the pool follows its volume: a source's batch
+    size grows while its pages come back full and shrinks when they come
+    back empty, exactly as it would in a standalone
+    :class:`cloudpassage.TimeSeries`.  When no source returns new items,
+    polling backs off from ``min_poll_interval`` to ``max_poll_interval``,
+    and snaps back as soon as any source has items.
+
+    Items are yielded as (source, item) tuples.  Each round of polling is
+    yielded in ``created_at`` order across all sources.  Each source's
+    checkpoint, if configured, is saved once the consumer finishes the
+    round.
+
+    In order to cleanly stop the generator, set the object's ``stop``
+    attribute to ``True``.
+
+    Example::
+
+        events = cloudpassage.TimeSeries(session, start_time, "/v1/events",
+                                         "events")
+        issues = cloudpassage.TimeSeries(session, start_time, "/v3/issues",
+                                         "issues")
+        stream = cloudpassage.MultiTimeSeries({"events": events,
+                                               "issues": issues})
+        for source, item in stream:
+            print(source, item["id"])
+
+    Args:
+        sources(dict): Source name to :class:`cloudpassage.TimeSeries`.
+
+    Keyword Args:
+        max_threads(int): Number of threads shared by all sources.  Defaults
+            to 10.
+        min_poll_interval(float): Seconds to wait before polling again after
+            the first round with no new items.  Defaults to 1.
+        max_poll_interval(float): Longest wait between polls while all
+            sources are idle, in seconds.  Defaults to 60.
+
+    Attributes:
+        stop(bool):
+            Set to ``False`` by default. When set to ``True``, the generator
+            will return, effecting a clean exit.
+    """
+
+    def __init__(self, sources, **kwargs):
+        if not sources:
+            raise CloudPassageValidation("MultiTimeSeries needs a source")
+        self.sources = sources
+        self.max_threads = kwargs.get("max_threads", 10)
+        self.min_poll_interval = kwargs.get("min_poll_interval", 1)
+        self.max_poll_interval = kwargs.get("max_poll_interval", 60)
+        self.poll_interval = self.min_poll_interval
+        self.stop = False
+        self.pool = None
+        return
+
+    def __iter__(self):
+        """Yield (source, item) tuples from all sources. Forever."""
+        try:
+            while not self.stop:
+                items = self.get_next_round()
+                for source_item in items:
+                    yield source_item
+                if items:
+                    for series in self.sources.values():
+                        series.save_checkpoint()
+        finally:
+            self.close()
+
+    def get_next_round(self):
+        """Poll every source once, through the shared thread pool.
+
+        Returns:
+            list: (source, item) tuples, in ``created_at`` order.
+        """
+        jobs = []
+        for name, series in self.sources.items():
+            deadline = series.get_batch_deadline()
+            for url in series.get_batch_urls():
+                jobs.append((name, url, deadline))
+        pages = self.get_pool().map(self.get_page, jobs)
+        per_source = {}
+        for (name, _, _), page in zip(jobs, pages):
+            per_source.setdefault(name, []).append(page)
+        batches = []
+        for name, series in self.sources.items():
+            batches.append((name, series.process_batch(per_source[name])))
+        items = list(self.merge_batches(batches))
+        if not items:
+            self.wait_for_items()
+            return []
+        self.poll_interval = self.min_poll_interval
+        return items
+
+    def get_page(self, job):
+        """Retrieve one page for a source.
+
+        Args:
+            job(tuple): Source name, (path, params) tuple, and deadline.
+
+        Returns:
+            dict: Page contents as dict
+        """
+        name, url, deadline = job
+        return self.sources[name].get_page(url, deadline)
+
+    def merge_batches(self, batches):
+        """Yield (source, item) tuples from several batches, in time order.
+
+        Args:
+            batches(list): (source, items) tuples, where items are sorted
+                by the source's sort key.
+
+        Yields:
+            tuple: (source, item)
+        """
+        def decorate(index, name, items):
+            sort_key = self.sources[name].sort_key
+            for position, item in enumerate(items):
+                yield item[sort_key], index, position, name, item
+
+        decorated = [decorate(index, name, items)
+                     for index, (name, items) in enumerate(batches)]
+        for merged in heapq.merge(*decorated):
+            yield merged[3], merged[4]
+
+    def wait_for_items(self):
+        """Sleep after an idle round, then back off the poll interval.
+
+        The wait is cut short if ``stop`` is set.
+        """
+        resume_at = time.time() + self.poll_interval
+        while not self.stop:
+            remaining = resume_at - time.time()
+            if remaining <= 0:
+                break
+            time.sleep(min(remaining, 1))
+        self.poll_interval = min(self.poll_interval * 2,
+                                 self.max_poll_interval)
+        return
+
+    def get_pool(self):
+        """Return the shared thread pool, creating it if necessary."""
+        if self.pool is None:
+            for series in self.sources.values():
+                utility.ensure_pool_capacity(series.session,
+                                             self.max_threads)
+            self.pool = ThreadPool(self.max_threads)
+        return self.pool
+
+    def close(self):
+        """Shut down the shared thread pool."""
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        return
@@ -0,0 +1,149 @@
+"""RateLimiter class.
+
+Client-side token bucket rate limiting for requests made through a
+HaloSession.
+"""
+
+import threading
+import time
+# This is for Python 3 compatibility
+try:
+    from urllib.parse import urlsplit
+except ImportError:
+    from urlparse import urlsplit
+
+# time.monotonic() is unaffected by system clock changes, but is Python 3 only.
+monotonic = getattr(time, "monotonic", time.time)
+
+
+class TokenBucket(object):
+    """A thread-safe token bucket.
+
+    Tokens accumulate at ``rate`` per second, up to ``burst``.  Callers
+    reserve one token per request.  If the bucket is empty, the reservation
+    is still granted, and the caller is told how long to wait before using
+    it.  This keeps requests evenly spaced under contention without any
+    thread holding the lock while it sleeps.
+
+    Args:
+        rate (float): Tokens added per second.
+        burst (float): Maximum number of tokens held.  Defaults to ``rate``,
+            with a minimum of 1.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst) if burst else max(self.rate, 1.0)
+        self.tokens = self.capacity
+        self.timestamp = monotonic()
+        self.lock = threading.Lock()
+
+    def refill(self):
+        """Add the tokens accumulated since the last call.  Hold the lock."""
+        current = monotonic()
+        elapsed = current - self.timestamp
+        self.tokens = min(self.capacity, self.tokens + (elapsed * self.rate))
+        self.timestamp = current
+        return
+
+    def try_acquire(self):
+        """Take one token, only if one is available.
+
+        Returns:
+            bool: True if a token was taken.
+        """
+        with self.lock:
+            self.refill()
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+    def reserve(self):
+        """Take one token.
+
+        Returns:
+            float: Number of seconds the caller must wait before using the
+                token.  Zero if a token was available.
+        """
+        with self.lock:
+            self.refill()
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0
+            return -self.tokens / self.rate
+
+
+class RateLimiter(object):
+    """Client-side rate limiter for a :class:`cloudpassage.HaloSession`.
+
+    Every request made through the session takes a token from the global
+    bucket, and from the bucket for the longest matching entry in
+    ``endpoint_rates``, if any.  The request waits until both buckets allow
+    it.  All threads using the session share the same buckets.
+
+    Example::
+
+        # Overall limit of 10 requests/second, with events limited to 2.
+        limiter = cloudpassage.RateLimiter(10,
+                                           endpoint_rates={"/v1/events": 2})
+        session = cloudpassage.HaloSession(key, secret,
+                                           rate_limiter=limiter)
+
+    Args:
+        rate (float): Requests per second, across all endpoints.  If None,
+            only ``endpoint_rates`` are enforced.
+
+    Keyword Args:
+        burst (float): Number of requests which may be made at once, after
+            a period of inactivity.  Defaults to ``rate``.
+        endpoint_rates (dict): Requests per second for specific endpoints.
+            Keys are URL path prefixes, like ``/v1/servers``.
+    """
+
+    def __init__(self, rate=None, **kwargs):
+        self.bucket = None
+        self.endpoint_buckets = {}
+        if rate:
+            self.bucket = TokenBucket(rate, kwargs.get("burst"))
+        if "endpoint_rates" in kwargs:
+            for prefix, prefix_rate in kwargs["endpoint_rates"].items():
+                self.endpoint_buckets[prefix] = TokenBucket(prefix_rate)
+
+    def get_endpoint_bucket(self, path):
+        """Return the bucket for the longest prefix matching ``path``.
+
+        Args:
+            path (str): URL path, like ``/v1/servers/abc123``.
+
+        Returns:
+            TokenBucket: None if no prefix matches.
+        """
+        matches = [prefix for prefix in self.endpoint_buckets
+                   if path == prefix or path.startswith(prefix + "/")]
+        if not matches:
+            return None
+        return self.endpoint_buckets[max(matches, key=len)]
+
+    def reserve(self, url):
+        """Reserve capacity for a request to ``url``.
+
+        Args:
+            url (str): Complete URL or path for the request.
+
+        Returns:
+            float: Number of seconds to wait before making the request.
+        """
+        delays = [0]
+        path = urlsplit(url).path
+        for bucket in [self.bucket, self.get_endpoint_bucket(path)]:
+            if bucket is not None:
+                delays.append(bucket.reserve())
+        return max(delays)
+
+    def wait(self, url):
+        """Block until a request to ``url`` is allowed."""
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+        return None
@@ -0,0 +1,182 @@
+"""HaloRetry class.
+
+Retry policy for requests made through a HaloSession.
+"""
+
+import contextlib
+import random
+import threading
+import time
+from urllib3.util.retry import Retry
+
+
+class HaloRetry(Retry):
+    """urllib3 retry policy tuned for the Halo API.
+
+    This differs from :class:`urllib3.util.retry.Retry` in four ways:
+
+    * Backoff between retries uses decorrelated jitter: each delay is drawn
+      at random between ``backoff_factor`` and three times the previous
+      delay, capped at ``max_backoff``.  Threads that fail together do not
+      retry together.
+    * A rate-limit reset time given in ``Retry-After`` or
+      ``X-RateLimit-Reset`` is honored, plus up to ``backoff_factor``
+      seconds of jitter, so that threads released by the same reset are
+      spread out.
+    * If a ``budget`` is given, each retry takes a token from it.  When the
+      budget is exhausted, requests fail instead of retrying, which keeps
+      a session from amplifying an outage.
+    * If the request was made within :meth:`request_deadline`, retries are
+      exhausted once the deadline passes, and no sleep between retries
+      runs past it.
+
+    Args:
+        budget (TokenBucket): Retry budget, shared by every request made
+            through the session.  Unlimited if not set.
+        last_backoff (float): Previous backoff delay, in seconds.  Carried
+            between retries of one request.
+
+    All other arguments are passed to :class:`urllib3.util.retry.Retry`.
+    """
+
+    # Upper limit for backoff between retries, in seconds.
+    max_backoff = 60
+    # Deadline for the request being made by each thread.  The adapter
+    # shares one policy between all requests, so a request's deadline
+    # can't be passed to the policy directly.
+    request_deadlines = threading.local()
+
+    def __init__(self, budget=None, last_backoff=None, **kwargs):
+        super(HaloRetry, self).__init__(**kwargs)
+        self.budget = budget
+        self.last_backoff = last_backoff
+
+    def new(self, **kwargs):
+        """Return a copy of this policy, carrying over budget and backoff."""
+        kwargs.setdefault("budget", self.budget)
+        kwargs.setdefault("last_backoff", self.last_backoff)
+        return super(HaloRetry, self).new(**kwargs)
+
+    def increment(self, *args, **kwargs):
+        """Record a retry, or fail at once if the retry budget is exhausted
+        or the request's deadline has passed.
+
+        Raises:
+            urllib3.exceptions.MaxRetryError: If retries are exhausted.
+        """
+        remaining = self.get_deadline_remaining()
+        if self.total != 0 and (
+                (remaining is not None and remaining <= 0) or
+                (self.budget is not None and not self.budget.try_acquire())):
+            exhausted = self.new(total=0, budget=None)
+            return exhausted.increment(*args, **kwargs)
+        return super(HaloRetry, self).increment(*args, **kwargs)
+
+    @classmethod
+    @contextlib.contextmanager
+    def request_deadline(cls, deadline):
+        """Apply ``deadline`` to requests made by this thread, in this block.
+
+        Args:
+            deadline (float): UNIX timestamp, or None for no deadline.
+        """
+        previous = getattr(cls.request_deadlines, "deadline", None)
+        cls.request_deadlines.deadline = deadline
+        try:
+            yield
+        finally:
+            cls.request_deadlines.deadline = previous
+
+    @classmethod
+    def get_deadline_remaining(cls):
+        """Return seconds left before this thread's request deadline.
+
+        Returns:
+            float: Seconds, or None if there is no deadline.
+        """
+        deadline = getattr(cls.request_deadlines, "deadline", None)
+        if deadline is None:
+            return None
+        return deadline - time.time()
+
+    @classmethod
+    def cap_to_deadline(cls, delay):
+        """Shorten ``delay`` so that it ends by this thread's deadline."""
+        remaining = cls.get_deadline_remaining()
+        if remaining is None:
+            return delay
+        return max(min(delay, remaining), 0)
+
+    def get_backoff_time(self):
+        """Return the delay before the next retry, with decorrelated jitter.
+
+        Returns:
+            float: Seconds to wait.
+        """
+        if not self.history:
+            return 0
+        self.last_backoff = self.next_backoff(self.backoff_factor,
+                                              self.last_backoff,
+                                              self.max_backoff)
+        return self.cap_to_deadline(self.last_backoff)
+
+    @classmethod
+    def next_backoff(cls, base, last_backoff, cap):
+        """Return a decorrelated-jitter backoff delay.
+
+        Args:
+            base (float): Minimum delay, in seconds.
+            last_backoff (float): Previous delay, or None for the first one.
+            cap (float): Maximum delay, in seconds.
+
+        Returns:
+            float: Seconds to wait.
+        """
+        if last_backoff is None:
+            last_backoff = base
+        return min(cap, random.uniform(base, max(base, last_backoff * 3)))
+
+    def get_retry_after(self, response):
+        """Return seconds to wait as requested by the server, or None.
+
+        ``Retry-After`` takes precedence over ``X-RateLimit-Reset``.
+        """
+        retry_after = super(HaloRetry, self).get_retry_after(response)
+        if retry_after is None:
+            retry_after = self.get_rate_limit_reset(response.headers)
+        return retry_after
+
+    @classmethod
+    def get_rate_limit_reset(cls, headers):
+        """Return seconds until the rate limit resets, or None.
+
+        ``X-RateLimit-Reset`` may be either a number of seconds, or a UNIX
+        timestamp.
+
+        Args:
+            headers (dict): Response headers.
+
+        Returns:
+            float: Seconds to wait, or None if the header is absent or
+                malformed.
+        """
+        try:
+            reset = float(headers.get("X-RateLimit-Reset"))
+        except (TypeError, ValueError):
+            return None
+        if reset > 1000000000:  # A timestamp, not a number of seconds.
+            reset = reset - time.time()
+        return max(reset, 0)
+
+    def sleep_for_retry(self, response=None):
+        """Sleep as requested by the server, plus jitter.
+
+        Returns:
+            bool: True if the server requested a delay.
+        """
+        retry_after = self.get_retry_after(response)
+        if retry_after is None:
+            return False
+        time.sleep(self.cap_to_deadline(
+            retry_after + random.uniform(0, self.backoff_factor)))
+        return True
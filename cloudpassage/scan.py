@@ -1,5 +1,7 @@
 """Scan and CveException classes"""
 
+import collections
+from multiprocessing.dummy import Pool as ThreadPool
 import cloudpassage.sanity as sanity
 from .utility import Utility as utility
 from .exceptions import CloudPassageValidation
@@ -52,6 +54,8 @@ class Scan(HaloEndpoint):
     object_name = "scan"
     objects_name = "scans"
     default_endpoint_version = 1
+    history_per_page = 100
+    history_max_pages = 300
 
     def endpoint(self):
         """Return endpoint for API requests."""
@@ -148,26 +152,152 @@ class Scan(HaloEndpoint):
         """
 
         max_pages = 20
-        url_params = kwargs
-        if "server_id" in kwargs:
-            url_params["server_id"] = kwargs["server_id"]
-        if "module" in kwargs:
-            url_params["module"] = self.verify_and_build_module_params(
-                kwargs["module"])
-        if "status" in kwargs:
-            url_params["status"] = self.verify_and_build_status_params(
-                kwargs["status"])
         if "max_pages" in kwargs:
             max_pages = kwargs["max_pages"]
         endpoint = self.endpoint()
         key = "scans"
         request = HttpHelper(self.session)
-        params = utility.assemble_search_criteria(self.supported_search_fields,
-                                                  url_params)
+        params = self.build_scan_history_params(kwargs)
         response = request.get_paginated(endpoint, key, max_pages,
                                          params=params)
         return response
 
+    def iter_scan_history(self, since, until, **kwargs):
+        """Yield historical scans between ``since`` and ``until``.
+
+        The time range is split into windows of ``window_size`` seconds,
+        and up to ``max_threads`` windows are retrieved concurrently, each
+        page by page.  Scans are yielded one window at a time, in window
+        order, and at most ``max_threads * 2`` windows are held in memory at
+        a time.  A scan returned by two adjacent windows is only yielded
+        once.
+
+        There is no limit on the total number of pages retrieved.  A window
+        holding more scans than one window may retrieve
+        (``history_max_pages`` pages of ``history_per_page``, the same
+        300-page cap :meth:`cloudpassage.HttpHelper.get_paginated` applies)
+        is split in half before its pages are retrieved, so no scans are
+        lost.
+
+        Args:
+            since (str): ISO 8601 formatted string representing the starting
+                date and time for query
+            until (str): ISO 8601 formatted string representing the ending
+                date and time for query
+
+        Keyword args:
+            server_id (str): Id of server
+            module (str or list): sca, fim, svm, sam
+            status (str or list): queued, pending, running, completed_clean,
+                completed_with_errors, failed
+            window_size (int): Length of each window, in seconds.  Defaults
+                to one day.
+            max_threads (int): Number of windows retrieved concurrently.
+                Defaults to 5.
+
+        Yields:
+            dict: One scan object.
+        """
+        window_size = kwargs.pop("window_size", 86400)
+        max_threads = kwargs.pop("max_threads", 5)
+        params = self.build_scan_history_params(kwargs)
+        windows = utility.split_time_range(since, until, window_size)
+        utility.ensure_pool_capacity(self.session, max_threads)
+        pool = ThreadPool(max_threads)
+        in_flight = collections.deque()
+        prior_ids = set([])
+        try:
+            for window in windows:
+                if len(in_flight) >= max_threads * 2:
+                    for scan in self.remove_duplicate_scans(
+                            in_flight.popleft().get(), prior_ids):
+                        yield scan
+                in_flight.append(pool.apply_async(self.get_scan_window,
+                                                  (params,) + window))
+            while in_flight:
+                for scan in self.remove_duplicate_scans(
+                        in_flight.popleft().get(), prior_ids):
+                    yield scan
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def get_scan_window(self, params, since, until):
+        """Return all scans between ``since`` and ``until``.
+
+        The ``count`` in the first page tells whether the window holds more
+        than ``history_max_pages`` pages.  If so, it is split in half, and
+        each half is retrieved in turn.
+
+        Args:
+            params (dict): URL parameters, from
+                :meth:`build_scan_history_params`.
+            since (str): ISO 8601 formatted start of window.
+            until (str): ISO 8601 formatted end of window.
+
+        Returns:
+            list: List of scan objects
+        """
+        window_params = dict(params)
+        window_params["since"] = since
+        window_params["until"] = until
+        window_params["per_page"] = self.history_per_page
+        request = HttpHelper(self.session)
+        page = request.get(self.endpoint(), params=window_params)
+        full = self.history_per_page * self.history_max_pages
+        start = utility.iso8601_to_datetime(since)
+        end = utility.iso8601_to_datetime(until)
+        length = (end - start).total_seconds()
+        if page.get("count", 0) > full and length > 1:
+            halves = utility.split_time_range(since, until, (length + 1) // 2)
+            scans = []
+            prior_ids = set([])
+            for half_since, half_until in halves:
+                scans.extend(self.remove_duplicate_scans(
+                    self.get_scan_window(params, half_since, half_until),
+                    prior_ids))
+            return scans
+        scans, next_page = request.process_page(page, "scans")
+        pages_parsed = 1
+        while next_page is not None and pages_parsed < self.history_max_pages:
+            page_scans, next_page = request.process_page(
+                request.get(next_page), "scans")
+            scans.extend(page_scans)
+            pages_parsed += 1
+        return scans
+
+    @classmethod
+    def remove_duplicate_scans(cls, scans, prior_ids):
+        """Drop scans already yielded from the previous window.
+
+        Adjacent windows share a boundary, so a scan at the boundary may be
+        returned by both.  ``prior_ids`` is replaced with the IDs in
+        ``scans``, for comparison with the next window.
+
+        Args:
+            scans (list): Scans from one window.
+            prior_ids (set): IDs of scans from the previous window.
+
+        Returns:
+            list: Scans not in the previous window.
+        """
+        unique = [scan for scan in scans if scan["id"] not in prior_ids]
+        prior_ids.clear()
+        prior_ids.update(scan["id"] for scan in scans)
+        return unique
+
+    def build_scan_history_params(self, kwargs):
+        """Verify scan history search criteria, and build URL params."""
+        url_params = dict(kwargs)
+        if "module" in kwargs:
+            url_params["module"] = self.verify_and_build_module_params(
+                kwargs["module"])
+        if "status" in kwargs:
+            url_params["status"] = self.verify_and_build_status_params(
+                kwargs["status"])
+        return utility.assemble_search_criteria(self.supported_search_fields,
+                                                url_params)
+
     def findings(self, scan_id, findings_id):
         """Get FIM, CSM, and SVA findings details by scan and findings ID
 
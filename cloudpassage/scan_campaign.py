@@ -0,0 +1,260 @@
+"""ScanCampaign class"""
+
+import time
+from .bulk_executor import BulkExecutor
+from .exceptions import CloudPassageGeneral
+from .exceptions import CloudPassageTimeout
+from .exceptions import CloudPassageValidation
+from .rate_limiter import RateLimiter
+from .scan import Scan
+from .server import Server
+
+
+class ScanCampaign(object):
+    """Run one type of scan across many servers, and collect the results.
+
+    Scans are launched at no more than ``launch_rate`` per second.  While
+    scans are still being launched, and after, the status of every
+    outstanding scan command is polled in batches, through a pool of
+    ``max_threads`` threads.  As each command completes, the server's last
+    scan results are retrieved and yielded.  While no command completes,
+    the poll interval backs off from ``min_poll_interval`` to
+    ``max_poll_interval``, and snaps back as soon as one does.
+
+    A server which cannot be scanned does not stop the campaign.  Its
+    exception is yielded in place of its results.  A scan is only given up
+    on if its command fails, or if polling its status fails
+    ``max_poll_errors`` times in a row.  Other errors while polling, like a
+    timeout or an open circuit breaker, are retried in the next round.
+
+    Results are yielded as (server_id, results, exception) tuples, in order
+    of completion.  ``exception`` is None if the scan succeeded, otherwise
+    ``results`` is None.
+
+    In order to cleanly stop the generator, set the object's ``stop``
+    attribute to ``True``.
+
+    Example::
+
+        campaign = cloudpassage.ScanCampaign(session, "sva", launch_rate=2)
+        for server_id, results, exc in campaign.run(server_ids):
+            if exc is not None:
+                print("Scan failed for %s: %s" % (server_id, exc))
+            print(campaign.progress())
+
+    Args:
+        session (:class:`cloudpassage.HaloSession`): Session used for all
+            requests.
+        scan_type (str): Type of scan to run.  Must be supported by both
+            :meth:`cloudpassage.Scan.initiate_scan` and
+            :meth:`cloudpassage.Scan.last_scan_results`.
+
+    Keyword Args:
+        launch_rate (float): Scans launched per second.  Defaults to 5.
+        max_threads (int): Number of concurrent requests for launching, and
+            for polling.  Defaults to 10.
+        min_poll_interval (float): Seconds to wait between polls, while scans
+            are completing.  Defaults to 5.
+        max_poll_interval (float): Longest wait between polls while no scan
+            completes, in seconds.  Defaults to 60.
+        max_poll_errors (int): Number of consecutive failures to poll a
+            scan's status before giving up on it.  Defaults to 3.
+        timeout (float): Seconds to wait for all scans to complete, after
+            the last one is launched.  Scans still running after this are
+            reported with a :class:`cloudpassage.CloudPassageTimeout`.
+            Defaults to None (wait indefinitely).
+
+    Attributes:
+        stop(bool):
+            Set to ``False`` by default. When set to ``True``, the generator
+            will return, effecting a clean exit.
+    """
+
+    completed_statuses = ["completed"]
+    failed_statuses = ["failed"]
+
+    def __init__(self, session, scan_type, **kwargs):
+        self.scan = Scan(session)
+        self.server = Server(session)
+        if (self.scan.scan_type_supported(scan_type) is False or
+                self.scan.scan_history_supported(scan_type) is False):
+            exception_message = "Unsupported scan type: %s" % scan_type
+            raise CloudPassageValidation(exception_message)
+        self.session = session
+        self.scan_type = scan_type
+        self.launch_limiter = RateLimiter(kwargs.get("launch_rate", 5),
+                                          burst=1)
+        self.max_threads = kwargs.get("max_threads", 10)
+        self.min_poll_interval = kwargs.get("min_poll_interval", 5)
+        self.max_poll_interval = kwargs.get("max_poll_interval", 60)
+        self.max_poll_errors = kwargs.get("max_poll_errors", 3)
+        self.timeout = kwargs.get("timeout")
+        self.poll_interval = self.min_poll_interval
+        self.pending = {}
+        self.poll_errors = {}
+        self.counts = {"total": 0, "launched": 0, "completed": 0,
+                       "failed": 0, "poll_errors": 0}
+        self.started_at = None
+        self.stop = False
+        return
+
+    def run(self, server_ids):
+        """Scan each server, yielding results as scans complete.
+
+        Args:
+            server_ids (iterable): IDs of servers to scan.
+
+        Yields:
+            tuple: (server_id, results, exception)
+        """
+        self.started_at = time.time()
+        launcher = BulkExecutor(self.session, self.max_threads)
+        next_poll_at = time.time() + self.poll_interval
+        for server_id, command, exc in launcher.run(self.launch_scan,
+                                                    server_ids):
+            self.counts["total"] += 1
+            if exc is not None:
+                self.counts["failed"] += 1
+                yield server_id, None, exc
+            else:
+                self.counts["launched"] += 1
+                self.pending[server_id] = command["id"]
+            if self.stop:
+                return
+            if self.pending and time.time() >= next_poll_at:
+                finished = 0
+                for result in self.poll_round():
+                    finished += 1
+                    yield result
+                next_poll_at = time.time() + self.next_poll_delay(finished)
+        deadline = None
+        if self.timeout is not None:
+            deadline = time.time() + self.timeout
+        while self.pending and not self.stop:
+            if deadline is not None and time.time() >= deadline:
+                for server_id in sorted(self.pending):
+                    yield server_id, None, self.expire(server_id)
+                return
+            finished = 0
+            for result in self.poll_round():
+                finished += 1
+                yield result
+            if self.pending:
+                self.wait_for_scans(finished, deadline)
+
+    def poll_round(self):
+        """Poll every pending scan once.
+
+        Yields:
+            tuple: (server_id, results, exception) for each scan which
+                finished, or was given up on, in this round.
+        """
+        poller = BulkExecutor(self.session, self.max_threads)
+        for server_id, checked, exc in poller.run(self.check_scan,
+                                                  list(self.pending)):
+            if exc is not None:
+                self.counts["poll_errors"] += 1
+                errors = self.poll_errors.get(server_id, 0) + 1
+                self.poll_errors[server_id] = errors
+                if errors >= self.max_poll_errors:
+                    yield self.finish(server_id, None, exc)
+                continue
+            self.poll_errors.pop(server_id, None)
+            command, results = checked
+            if command["status"] in self.failed_statuses:
+                exception_message = "Scan command %s failed: %s" % (
+                    command.get("id"), command.get("result"))
+                yield self.finish(server_id, None,
+                                  CloudPassageGeneral(exception_message))
+            elif results is not None:
+                yield self.finish(server_id, results, None)
+
+    def finish(self, server_id, results, exc):
+        """Stop tracking a scan, and count its outcome.
+
+        Returns:
+            tuple: (server_id, results, exception)
+        """
+        del self.pending[server_id]
+        self.poll_errors.pop(server_id, None)
+        if exc is None:
+            self.counts["completed"] += 1
+        else:
+            self.counts["failed"] += 1
+        return server_id, results, exc
+
+    def progress(self):
+        """Report aggregate progress of the campaign.
+
+        Returns:
+            dict: Counts of servers ``total`` (seen so far), ``launched``,
+                ``pending``, ``completed``, and ``failed``, the number of
+                ``poll_errors`` retried or given up on, and ``elapsed``
+                seconds since the campaign started.
+        """
+        report = dict(self.counts)
+        report["pending"] = len(self.pending)
+        report["elapsed"] = 0
+        if self.started_at is not None:
+            report["elapsed"] = time.time() - self.started_at
+        return report
+
+    def launch_scan(self, server_id):
+        """Launch a scan on one server, within the launch rate.
+
+        Returns:
+            dict: Server command created for the scan.
+        """
+        self.launch_limiter.wait("/v1/servers/%s/scans" % server_id)
+        return self.scan.initiate_scan(server_id, self.scan_type)
+
+    def check_scan(self, server_id):
+        """Poll one server's scan command, collecting results if complete.
+
+        Returns:
+            tuple: The scan command, and the last scan results, or None if
+                the command has not completed.
+        """
+        command = self.server.command_details(server_id,
+                                              self.pending[server_id])
+        if command["status"] not in self.completed_statuses:
+            return command, None
+        return command, self.scan.last_scan_results(server_id,
+                                                    self.scan_type)
+
+    def expire(self, server_id):
+        """Give up on a pending scan, returning its exception."""
+        exception_message = "Scan of server %s still running after %s seconds"
+        exc = CloudPassageTimeout(exception_message % (server_id,
+                                                       self.timeout))
+        return self.finish(server_id, None, exc)[2]
+
+    def next_poll_delay(self, finished):
+        """Return the delay before the next round of polling.
+
+        The interval snaps back to ``min_poll_interval`` if any scan
+        finished in the last round, and doubles otherwise.
+        """
+        if finished:
+            self.poll_interval = self.min_poll_interval
+        delay = self.poll_interval
+        if not finished:
+            self.poll_interval = min(self.poll_interval * 2,
+                                     self.max_poll_interval)
+        return delay
+
+    def wait_for_scans(self, finished, deadline=None):
+        """Sleep before the next round of polling, adapting the interval.
+
+        See :meth:`next_poll_delay`.  The wait is cut short if ``stop`` is
+        set, or at ``deadline``.
+        """
+        resume_at = time.time() + self.next_poll_delay(finished)
+        if deadline is not None:
+            resume_at = min(resume_at, deadline)
+        while not self.stop:
+            remaining = resume_at - time.time()
+            if remaining <= 0:
+                break
+            time.sleep(min(remaining, 1))
+        return
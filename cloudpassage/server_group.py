@@ -4,6 +4,7 @@ from .utility import Utility as utility
 import cloudpassage.sanity as sanity
 from .http_helper import HttpHelper
 from .halo_endpoint import HaloEndpoint
+from .exceptions import CloudPassageValidation
 
 
 class ServerGroup(HaloEndpoint):
@@ -41,21 +42,49 @@ class ServerGroup(HaloEndpoint):
         """Defines the key used to pull the policy from the json document"""
         return ServerGroup.object_name
 
-    def list_members(self, group_id):
+    def list_members(self, group_id, **kwargs):
         """Returns a list of all member servers of a group_id
 
+        Members are retrieved page by page, up to ``max_pages`` pages of
+        100 servers.
+
         Args:
             group_id (str): ID of group_id
 
+        Keyword Args:
+            state (list or str): A list or comma-separated string
+                containing server states to include: `active`, `missing`,
+                `deactivated`, and `retired`.  Defaults to the API's
+                default (active servers only).
+            max_pages (int): Most pages of 100 servers to retrieve.
+                Defaults to 300, the most the SDK will page through in one
+                query.
+
         Returns:
             list: List of dictionary objects describing member servers
 
+        Raises:
+            CloudPassageValidation: The group has more members than can be
+                retrieved in ``max_pages`` pages.
+
         """
         sanity.validate_object_id(group_id)
-        # endpoint = "/v1/groups/{}/servers".format(group_id) # Invalid Endpoint
-        endpoint = "/v1/servers?group_id={}".format(group_id)
+        # "/v1/groups/{id}/servers" is not a valid endpoint
+        max_pages = kwargs.pop("max_pages", 300)
+        params = utility.sanitize_url_params(kwargs)
+        params["group_id"] = group_id
+        params["per_page"] = 100
         request = HttpHelper(self.session)
-        return request.get(endpoint)["servers"]
+        first_page = request.get("/v1/servers", params=params)
+        limit = params["per_page"] * max_pages
+        if first_page.get("count", 0) > limit:
+            exception_message = ("Group %s has %s members, more than the "
+                                 "%s which can be listed" %
+                                 (group_id, first_page["count"], limit))
+            raise CloudPassageValidation(exception_message)
+        return request.get_paginated("/v1/servers", "servers",
+                                     max_pages, params=params,
+                                     first_page=first_page)
 
     def create(self, group_name, **kwargs):
         """Creates a ServerGroup.
@@ -154,6 +183,10 @@ class ServerGroup(HaloEndpoint):
     def migrate_servers(self, grp_id, server_ids, srv_state=None):
         """Migrate servers in server_ids into the group identified by group_id.
 
+        Servers are moved one at a time, stopping at the first failure.  To
+        move many servers concurrently, with a report of each server's
+        outcome, use :meth:`migrate_servers_concurrently`.
+
         Args:
             grp_id (str): ID of group to merge
             server_ids (list): A list of server_id
@@ -168,27 +201,75 @@ class ServerGroup(HaloEndpoint):
         """
         if not srv_state:
             srv_state = "active,missing,deactivated,retired"
-
-        srv_ids = []
         body = {
             "server": {
                 "group_id": grp_id
             }
         }
         sanity.validate_object_id(grp_id)
+        request = HttpHelper(self.session)
         for server_id in server_ids:
             sanity.validate_object_id(server_id)
             endpoint = "/v1/servers/{}".format(server_id)
-            request = HttpHelper(self.session)
             request.put(endpoint, body)
+        return [srv["id"] for srv in self.list_members(grp_id,
+                                                       state=srv_state)]
+
+    def migrate_servers_concurrently(self, grp_id, server_ids, concurrency=10):
+        """Migrate many servers into a group, with bounded parallelism.
+
+        Each server is moved independently: a failure is recorded, and does
+        not stop the others.  Once every server has been attempted, each
+        server which was moved is read back, to confirm that it arrived.
 
-        sgrp_endpoint = "/v1/groups/{}/servers".format(grp_id)
-        params = {"state": srv_state}
-        response = request.get(sgrp_endpoint, params=params)
-        srv_list = response["servers"]
-        for srv in srv_list:
-            srv_ids.append(srv["id"])
-        return srv_ids
+        Args:
+            grp_id (str): ID of destination group.
+            server_ids (list): A list of server_id.
+            concurrency (int): Number of servers to move, or confirm, at
+                once.  Defaults to 10.
+
+        Returns:
+            dict: With the following keys:
+                ``migrated`` (list): IDs of servers successfully moved and
+                confirmed in the group.
+                ``unconfirmed`` (list): IDs of servers successfully moved,
+                but not found in the group, or which could not be read
+                back.
+                ``failed`` (dict): Exception raised for each server which
+                could not be moved, keyed by server ID.
+
+        """
+        server_ids = list(server_ids)
+        sanity.validate_object_id(grp_id)
+        sanity.validate_object_id(server_ids)
+        body = {"server": {"group_id": grp_id}}
+        request = HttpHelper(self.session)
+
+        def move_server(server_id):
+            request.put("/v1/servers/{}".format(server_id), body)
+
+        def get_server_group(server_id):
+            endpoint = "/v1/servers/{}".format(server_id)
+            return request.get(endpoint)["server"].get("group_id")
+
+        moved = []
+        failed = {}
+        for server_id, _, exc in self.fan_out(move_server, server_ids,
+                                              concurrency):
+            if exc is None:
+                moved.append(server_id)
+            else:
+                failed[server_id] = exc
+        confirmed = set([])
+        for server_id, server_grp, exc in self.fan_out(get_server_group,
+                                                       moved, concurrency):
+            if exc is None and server_grp == grp_id:
+                confirmed.add(server_id)
+        moved = set(moved)
+        return {"migrated": [x for x in server_ids if x in confirmed],
+                "unconfirmed": [x for x in server_ids
+                                if x in moved and x not in confirmed],
+                "failed": failed}
 
     def list_connections(self, group_id, **kwargs):
         """Return all recently detected connections in the server group.
@@ -1,13 +1,21 @@
+import collections
+import functools
 import operator
+import threading
 import time
 from .http_helper import HttpHelper
 from multiprocessing.dummy import Pool as ThreadPool
 from .exceptions import CloudPassageValidation
+from .utility import Utility as utility
 # urllib in py 2 vs 3 is quite different...
 try:
     from urllib import urlencode
 except ImportError:
     from urllib.parse import urlencode
+try:
+    import queue
+except ImportError:
+    import Queue as queue
 
 
 class TimeSeries(object):
@@ -44,15 +52,52 @@ class TimeSeries(object):
         item_key(str): Top-level key, below which is a list of target items.
         params(dict): Parameters for URL, which will be URL-encoded.
 
+    Keyword Args:
+        checkpoint_store(object): A :class:`cloudpassage.FileCheckpointStore`
+            or :class:`cloudpassage.SqliteCheckpointStore`.  If the
+            store holds a checkpoint for this stream, the stream resumes from
+            it instead of ``start_time``.  A new checkpoint is saved each
+            time the consumer finishes a batch of items.  Items from a batch
+            the consumer did not finish are delivered again on resume.
+        checkpoint_key(str): Name of this stream in the checkpoint store.
+            Defaults to ``start_url``.
+        min_poll_interval(float): Seconds to wait before polling again after
+            the first empty batch.  Defaults to 1.
+        max_poll_interval(float): Longest wait between polls of an idle
+            stream, in seconds.  Defaults to 60.
+        prefetch_batches(int): If set, a background thread retrieves batches
+            while the consumer processes earlier ones, holding up to this
+            many batches ready.  When that many are waiting, retrieval
+            pauses until the consumer catches up.  Exceptions raised while
+            retrieving are re-raised to the consumer.  Applies to iterating
+            over the stream and to :meth:`iter_batches`.  Defaults to 0,
+            which retrieves each batch only when the consumer asks for it.
+        batch_timeout(float): Wall-clock budget, in seconds, for retrieving
+            all the pages of one batch (or one backfill window).  Each page
+            request is given the batch's deadline, and
+            :class:`cloudpassage.CloudPassageTimeout` is raised if it cannot
+            be met.  Unlimited by default; each request is still bounded by
+            the session's timeouts.
+
     Attributes:
         stop(bool):
             Set to ``False`` by default. When set to ``True``, the generator
-            will return, effecting a clean exit.
+            will return, effecting a clean exit.  The thread pool used for
+            retrieving pages is shut down when the generator exits.
+        poll_interval(float):
+            Seconds to wait after the next empty batch.  This doubles with
+            each consecutive empty batch, up to ``max_poll_interval``, and
+            falls back to ``min_poll_interval`` as soon as items arrive.
     """
 
     allowed_urls = ["/v1/events", "/v1/scans", "/v3/issues"]
+    # Seconds to wait for the prefetch thread to finish when the consumer
+    # stops.  A thread still retrieving a batch after this is left to
+    # finish on its own, and shuts down the thread pool when it does.
+    producer_join_timeout = 5
 
-    def __init__(self, session, start_time, start_url, item_key, params={}):
+    def __init__(self, session, start_time, start_url, item_key, params={},
+                 **kwargs):
         self.url = start_url
         self.params = params
         self.start_url = start_url
@@ -68,16 +113,389 @@ class TimeSeries(object):
         self.params["sort_by"] = "created_at.asc"
         self.verify_start_url(start_url)
         self.stop = False
-        self.prior_batch_ids = set([])
+        self.boundary_ids = set([])
+        self.helper = HttpHelper(session)
+        self.pool = None
+        self.checkpoint_store = kwargs.get("checkpoint_store")
+        self.checkpoint_key = kwargs.get("checkpoint_key", start_url)
+        self.min_poll_interval = kwargs.get("min_poll_interval", 1)
+        self.max_poll_interval = kwargs.get("max_poll_interval", 60)
+        self.poll_interval = self.min_poll_interval
+        self.prefetch_batches = kwargs.get("prefetch_batches", 0)
+        self.batch_timeout = kwargs.get("batch_timeout")
+        self.producer_stop = threading.Event()
+        self.producer = None
+        if self.checkpoint_store is not None:
+            self.load_checkpoint()
         return
 
     def __iter__(self):
-        """Yields one item from a time-series query against Halo. Forever."""
-        while True:
-            if self.stop:
-                return
-            for item in self.get_next_batch():
+        """Yields one item from a time-series query against Halo. Forever.
+
+        Unless ``prefetch_batches`` is set, items are yielded as each page
+        of a batch arrives, rather than once the whole batch is in.
+        """
+        if self.prefetch_batches:
+            items = self.iter_prefetched_items()
+        else:
+            items = self.iter_streamed_items()
+        try:
+            for item in items:
                 yield item
+        finally:
+            items.close()
+            self.close()
+
+    def iter_streamed_items(self):
+        """Yield items, retrieving each batch on demand.
+
+        The checkpoint is saved once every item of a batch is yielded.
+        """
+        while not self.stop:
+            delivered = False
+            for item in self.iter_next_batch():
+                delivered = True
+                yield item
+            if delivered:
+                self.save_checkpoint()
+
+    def iter_prefetched_items(self):
+        """Yield items from batches retrieved by a producer thread.
+
+        The checkpoint is saved once every item of a batch is yielded.
+        """
+        batches = self.get_prefetched_batches()
+        try:
+            for batch, cursor in batches:
+                for item in batch:
+                    yield item
+                self.save_checkpoint(cursor)
+        finally:
+            batches.close()
+
+    def get_prefetched_batches(self):
+        """Yield batches retrieved ahead of time by a producer thread.
+
+        Yields:
+            tuple: List of items, and cursor as (since, boundary IDs).
+        """
+        batches = self.start_producer()
+        try:
+            while not self.stop:
+                batch, cursor = self.next_batch(batches)
+                if batch:
+                    yield batch, cursor
+        finally:
+            self.stop_producer()
+
+    def next_batch(self, batches=None, max_wait=None):
+        """Return the next batch, from the producer thread if there is one.
+
+        Args:
+            batches(Queue): Queue filled by :meth:`produce_batches`, or None
+                to retrieve the batch in this thread.
+            max_wait(float): Longest time to wait for items.  Waits are cut
+                to one second when reading from ``batches``, so that ``stop``
+                is checked regularly.
+
+        Returns:
+            tuple: List of items, which may be empty, and cursor as (since,
+                boundary IDs).
+        """
+        if batches is None:
+            return self.get_next_batch(max_wait), self.get_cursor()
+        timeout = 1 if max_wait is None else min(max_wait, 1)
+        try:
+            batch, cursor, exception = batches.get(timeout=timeout)
+        except queue.Empty:
+            return [], None
+        if exception is not None:
+            raise exception
+        return batch, cursor
+
+    def start_producer(self):
+        """Start a thread which retrieves batches ahead of the consumer.
+
+        If a previous producer is still finishing its last request, it is
+        waited for first, so that only one thread advances the cursor.
+
+        Returns:
+            Queue: Queue of (items, cursor, exception) tuples.
+        """
+        if self.producer is not None:
+            self.producer.join()
+        batches = queue.Queue(self.prefetch_batches)
+        self.producer_stop.clear()
+        self.producer = threading.Thread(target=self.produce_batches,
+                                         args=(batches,))
+        self.producer.daemon = True
+        self.producer.start()
+        return batches
+
+    def stop_producer(self):
+        """Tell the producer thread to stop, and wait for it a short while.
+
+        The producer is a daemon thread, so one still waiting on a slow
+        request does not keep the process alive.
+        """
+        self.producer_stop.set()
+        self.producer.join(self.producer_join_timeout)
+        return
+
+    def produce_batches(self, batches):
+        """Put batches into the ``batches`` queue until stopped.
+
+        Blocks while the queue is full.  An exception raised while
+        retrieving a batch is put into the queue, and ends production.  The
+        thread pool is shut down on the way out, as no other thread uses it
+        while batches are prefetched.
+
+        Args:
+            batches(Queue): Queue of (items, cursor, exception) tuples.
+        """
+        try:
+            while not self.producer_stopped():
+                batch = self.get_next_batch()
+                if batch:
+                    self.put_batch(batches, (batch, self.get_cursor(), None))
+        except Exception as exception:  # pylint: disable=broad-except
+            self.put_batch(batches, (None, None, exception))
+        finally:
+            self.close_pool()
+        return
+
+    def put_batch(self, batches, entry):
+        """Put ``entry`` into ``batches``, unless production is stopped."""
+        while not self.producer_stopped():
+            try:
+                batches.put(entry, timeout=1)
+                return
+            except queue.Full:
+                continue
+        return
+
+    def producer_stopped(self):
+        """Return True if background retrieval should stop."""
+        return self.stop or self.producer_stop.is_set()
+
+    def get_cursor(self):
+        """Return a snapshot of the stream's cursor.
+
+        Returns:
+            tuple: ``since`` timestamp and set of boundary IDs.
+        """
+        return self.params["since"], set(self.boundary_ids)
+
+    def iter_batches(self, max_items=500, max_latency=5):
+        """Yield items from the time series in lists, for bulk consumers.
+
+        A list is yielded as soon as ``max_items`` items are buffered, or
+        when the oldest buffered item has waited ``max_latency`` seconds,
+        whichever is first.  While items are buffered, idle polling waits no
+        longer than the time left before they are due, so a slow trickle of
+        items is still flushed on time.
+
+        If a checkpoint store is configured, the checkpoint is saved when
+        the consumer asks for the next list, up to the last API batch that
+        has been yielded in full.  Items still buffered when ``stop`` is set
+        are discarded, and delivered again on resume.
+
+        Args:
+            max_items(int): Largest number of items in one list.
+            max_latency(float): Longest time, in seconds, that an item is
+                buffered before it is yielded.
+
+        Yields:
+            list: Between 1 and ``max_items`` items, in ``created_at`` order.
+        """
+        buffered = []
+        oldest = None
+        received = 0
+        delivered = 0
+        # (items received up to the end of an API batch, cursor after it)
+        batch_ends = collections.deque()
+        batches = None
+        if self.prefetch_batches:
+            batches = self.start_producer()
+        try:
+            while not self.stop:
+                max_wait = None
+                if buffered:
+                    max_wait = max(oldest + max_latency - time.time(), 0)
+                batch, cursor = self.next_batch(batches, max_wait)
+                if batch:
+                    if not buffered:
+                        oldest = time.time()
+                    buffered.extend(batch)
+                    received += len(batch)
+                    batch_ends.append((received, cursor))
+                due = buffered and time.time() - oldest >= max_latency
+                while len(buffered) >= max_items or (due and buffered):
+                    chunk = buffered[:max_items]
+                    buffered = buffered[max_items:]
+                    yield chunk
+                    delivered += len(chunk)
+                    cursor = None
+                    while batch_ends and batch_ends[0][0] <= delivered:
+                        cursor = batch_ends.popleft()[1]
+                    if cursor is not None:
+                        self.save_checkpoint(cursor)
+                    if self.stop:
+                        return
+                if not buffered:
+                    oldest = None
+        finally:
+            if batches is not None:
+                self.stop_producer()
+            self.close()
+
+    def backfill(self, until, window_size=3600):
+        """Yield all items from the stream's current cursor until ``until``.
+
+        The time range is split into windows of ``window_size`` seconds,
+        and up to ``max_threads`` windows are retrieved concurrently.  Items
+        are yielded in ``created_at`` order, and at most ``max_threads * 2``
+        windows are held in memory at a time.
+
+        The stream's cursor (and checkpoint, if configured) advances as each
+        window is yielded, so iterating over the stream after the backfill
+        completes continues from the last item backfilled.
+
+        Args:
+            until(str): ISO 8601-formatted timestamp for the end of the
+                backfill.
+            window_size(int): Length of each window, in seconds.  Defaults
+                to one hour.
+
+        Yields:
+            dict: One item from the time series.
+        """
+        windows = utility.split_time_range(self.params["since"], until,
+                                           window_size)
+        try:
+            for items in self.get_windows(windows):
+                items = self.remove_duplicate_items(items, self.boundary_ids)
+                for item in items:
+                    yield item
+                if items:
+                    self.advance_cursor(items)
+                    self.save_checkpoint()
+                if self.stop:
+                    return
+        finally:
+            self.close()
+
+    def get_windows(self, windows):
+        """Yield the items from each window, in order.
+
+        Windows are retrieved concurrently, up to ``max_threads * 2`` ahead
+        of the one being yielded.
+
+        Args:
+            windows(list): List of (since, until) tuples.
+
+        Yields:
+            list: Items from one window, in ``created_at`` order.
+        """
+        pool = self.get_pool()
+        in_flight = collections.deque()
+        for window in windows:
+            if len(in_flight) >= self.max_threads * 2:
+                yield in_flight.popleft().get()
+            in_flight.append(pool.apply_async(self.get_window, window))
+        while in_flight:
+            yield in_flight.popleft().get()
+
+    def get_window(self, since, until):
+        """Return all items created between ``since`` and ``until``.
+
+        Pages are retrieved sequentially, until a page with fewer than
+        ``page_size`` items is returned.
+
+        Args:
+            since(str): ISO 8601-formatted start of window.
+            until(str): ISO 8601-formatted end of window.
+
+        Returns:
+            list: Items, in ``created_at`` order.
+        """
+        params = dict(self.params)
+        params["since"] = since
+        params["until"] = until
+        items = []
+        page_number = 1
+        deadline = self.get_batch_deadline()
+        while True:
+            params["page"] = page_number
+            page = self.get_page((self.start_url, params), deadline)
+            items.extend(page[self.item_key])
+            if len(page[self.item_key]) < self.page_size:
+                return items
+            page_number += 1
+
+    def advance_cursor(self, items):
+        """Move the stream's cursor to the last of ``items``.
+
+        Queries start at the cursor, inclusive, so the only items that can be
+        delivered twice are those created at exactly the cursor timestamp.
+        ``boundary_ids`` holds the IDs of those items, across however many
+        batches share that timestamp.  It is emptied when the cursor moves
+        past them, so its size is bounded by the number of items sharing one
+        timestamp, not by the volume of the stream.
+
+        Args:
+            items(list): Items just delivered, in ``created_at`` order.
+        """
+        last_item_timestamp = items[-1]['created_at']
+        boundary_ids = set([x["id"] for x in items
+                            if x["created_at"] == last_item_timestamp])
+        if last_item_timestamp == self.params["since"]:
+            boundary_ids.update(self.boundary_ids)
+        self.boundary_ids = boundary_ids
+        self.params["since"] = last_item_timestamp
+        return
+
+    def load_checkpoint(self):
+        """Resume from the checkpoint store, if it holds a checkpoint."""
+        checkpoint = self.checkpoint_store.load(self.checkpoint_key)
+        if checkpoint is not None:
+            self.params["since"] = checkpoint["since"]
+            self.boundary_ids = set(checkpoint["ids"])
+        return
+
+    def save_checkpoint(self, cursor=None):
+        """Save the stream's cursor to the checkpoint store, if configured.
+
+        Args:
+            cursor(tuple): ``since`` timestamp and set of boundary IDs to
+                save.  Defaults to the stream's current cursor.
+        """
+        if self.checkpoint_store is None:
+            return
+        if cursor is None:
+            cursor = (self.params["since"], self.boundary_ids)
+        self.checkpoint_store.save(self.checkpoint_key, cursor[0],
+                                   sorted(cursor[1]))
+        return
+
+    def close(self):
+        """Shut down the thread pool used for retrieving pages.
+
+        If the prefetch thread is still running, the pool is left for it to
+        shut down once its last request is finished.
+        """
+        if self.producer is not None and self.producer.is_alive():
+            return
+        self.close_pool()
+        return
+
+    def close_pool(self):
+        """Shut down the thread pool, if it is running."""
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        return
 
     def adjust_batch_size(self, adjustment_factor):
         """Adjust the batch size for subsequent queries against Halo API.
@@ -148,25 +566,125 @@ class TimeSeries(object):
             adjustment_factor = -1
         return adjustment_factor
 
-    def get_next_batch(self):
-        """Gets the next batch of time-series items from the Halo API"""
-        url_list = self.create_url_batch(self.start_url, self.batch_size,
-                                         self.params)
-        pages = self.get_pages(url_list)
-        adjustment_factor = self.get_adjustment_factor(pages, self.page_size,
+    def get_next_batch(self, max_wait=None):
+        """Gets the next batch of time-series items from the Halo API
+
+        Args:
+            max_wait(float): Longest time to wait if the batch is empty.
+                Defaults to the current ``poll_interval``.
+        """
+        return list(self.iter_next_batch(max_wait))
+
+    def iter_next_batch(self, max_wait=None):
+        """Yield the next batch of time-series items, as their pages arrive.
+
+        See :meth:`iter_new_items`.  If the batch turns out to be empty,
+        waits before returning.
+
+        Args:
+            max_wait(float): Longest time to wait if the batch is empty.
+                Defaults to the current ``poll_interval``.
+        """
+        pages = self.iter_pages(self.get_batch_urls(),
+                                self.get_batch_deadline())
+        delivered = False
+        for item in self.iter_new_items(pages):
+            delivered = True
+            yield item
+        if not delivered:
+            self.wait_for_items(max_wait)
+            return
+        self.poll_interval = self.min_poll_interval
+
+    def get_batch_deadline(self):
+        """Return the deadline for a batch starting now, or None.
+
+        Returns:
+            float: UNIX timestamp, if ``batch_timeout`` is set.
+        """
+        if self.batch_timeout is None:
+            return None
+        return time.time() + self.batch_timeout
+
+    def get_batch_urls(self):
+        """Return the URLs for the next batch of pages.
+
+        Returns:
+            list: List of (path, params) tuples, one per page.
+        """
+        return self.create_url_batch(self.start_url, self.batch_size,
+                                     self.params)
+
+    def process_batch(self, pages):
+        """Return the new items from a batch of pages, and advance the cursor.
+
+        See :meth:`iter_new_items`.
+
+        Args:
+            pages(list): Pages retrieved from the URLs returned by
+                :meth:`get_batch_urls`, in the same order.
+
+        Returns:
+            list: Items not yet delivered, in ``created_at`` order.
+        """
+        return list(self.iter_new_items(pages))
+
+    def iter_new_items(self, pages):
+        """Yield the new items from a batch of pages, page by page.
+
+        The pages of a batch are consecutive pages of one query sorted by
+        ``created_at``, so their items are yielded in page order, without
+        sorting, as soon as each page arrives.  Once every page is in, the
+        cursor is advanced and the batch size for the next batch is adjusted
+        according to how full these pages are.  If the consumer stops
+        early, neither happens.
+
+        Args:
+            pages(iterable): Pages retrieved from the URLs returned by
+                :meth:`get_batch_urls`, in the same order.
+
+        Yields:
+            dict: Items not yet delivered, in ``created_at`` order.
+        """
+        seen_pages = []
+        items = []
+        item_ids = set([])
+        for page in pages:
+            seen_pages.append(page)
+            for item in page[self.item_key]:
+                if item["id"] in self.boundary_ids or item["id"] in item_ids:
+                    continue
+                item_ids.add(item["id"])
+                items.append(item)
+                yield item
+        adjustment_factor = self.get_adjustment_factor(seen_pages,
+                                                       self.page_size,
                                                        self.item_key)
         self.adjust_batch_size(adjustment_factor)
-        items = self.sorted_items_from_pages(pages, self.item_key,
-                                             self.sort_key)
-        items = self.remove_duplicate_items(items, self.prior_batch_ids)
-        try:
-            last_item_timestamp = items[-1]['created_at']
-        except IndexError:
-            time.sleep(3)
-            return []
-        self.params["since"] = last_item_timestamp
-        self.prior_batch_ids = set([x["id"] for x in items])
-        return items
+        if items:
+            self.advance_cursor(items)
+
+    def wait_for_items(self, max_wait=None):
+        """Sleep after an empty batch, then back off the poll interval.
+
+        The wait is cut short if ``stop`` is set.
+
+        Args:
+            max_wait(float): Longest time to wait.  Defaults to the current
+                ``poll_interval``.
+        """
+        wait = self.poll_interval
+        if max_wait is not None:
+            wait = min(wait, max_wait)
+        resume_at = time.time() + wait
+        while not self.producer_stopped():
+            remaining = resume_at - time.time()
+            if remaining <= 0:
+                break
+            time.sleep(min(remaining, 1))
+        self.poll_interval = min(self.poll_interval * 2,
+                                 self.max_poll_interval)
+        return
 
     @classmethod
     def get_number_of_empty_pages(cls, pages, item_key):
@@ -197,60 +715,96 @@ class TimeSeries(object):
         full = [page for page in pages if len(page[item_key]) == page_size]
         return len(full)
 
-    def get_pages(self, url_list):
-        """Map URLs to threads, return all when complete"""
-        page_helper = self.get_page
-        pool = ThreadPool(self.max_threads)
-        results = pool.map(page_helper, url_list)
-        pool.close()
-        pool.join()
+    def get_pages(self, url_list, deadline=None):
+        """Map URLs to threads, return all when complete.
+
+        The thread pool is created on first use, and kept until
+        :meth:`close` is called.
+
+        Args:
+            url_list(list): List of (path, params) tuples.
+            deadline(float): UNIX timestamp by which every page must be
+                retrieved, or None.
+        """
+        get_page = functools.partial(self.get_page, deadline=deadline)
+        results = self.get_pool().map(get_page, url_list)
         return results
 
-    def get_page(self, get_tup):
+    def iter_pages(self, url_list, deadline=None):
+        """Retrieve URLs concurrently, yielding each page in order.
+
+        Each page is yielded as soon as it, and every page before it, has
+        arrived.
+
+        Args:
+            url_list(list): List of (path, params) tuples.
+            deadline(float): UNIX timestamp by which every page must be
+                retrieved, or None.
+
+        Yields:
+            dict: Page contents as dict.
+        """
+        get_page = functools.partial(self.get_page, deadline=deadline)
+        for page in self.get_pool().imap(get_page, url_list):
+            yield page
+
+    def get_pool(self):
+        """Return the thread pool, creating it if necessary."""
+        if self.pool is None:
+            utility.ensure_pool_capacity(self.session, self.max_threads)
+            self.pool = ThreadPool(self.max_threads)
+        return self.pool
+
+    def get_page(self, get_tup, deadline=None):
         """Gets one page's contents.
 
         Args:
             get_tup(tuple): First item in tuple is a string, the URL.  The
                 second item is the params to be used in the query.
+            deadline(float): UNIX timestamp by which the page must be
+                retrieved, or None.
 
         Returns:
             dict: Page contents as dict
         """
-        helper = HttpHelper(self.session)
         path, args = get_tup[0], get_tup[1]
         url = "{path}?{opts}".format(path=path,
                                      opts=urlencode(dict(args)))
-        results = helper.get(url)
+        results = self.helper.get(url, deadline=deadline)
         return results
 
     @classmethod
     def remove_duplicate_items(cls, items_in, prior_batch_ids):
-        """Return only unique itemsself.
+        """Return only unique items.
 
         Args:
             items_in (list): List of dict-type items. These will be
                 deduplicated by item["id"].
             prior_batch_ids (set): Set of strings, where each string is the
-                id of an event which has already been yielded by __iter__().
+                id of an item which has already been yielded.  This set is
+                not modified.
 
         Returns:
             list: List of items, which is `items_in`, with duplicates removed
                 and any items with item["id"] existing in `prior_batch_ids`.
         """
         items_out = []
-        item_ids = set(prior_batch_ids)
+        item_ids = set([])
         for item in items_in:
-            if item["id"] not in item_ids:
-                item_ids.add(item["id"])
-                items_out.append(item)
-            else:
+            if item["id"] in prior_batch_ids or item["id"] in item_ids:
                 continue
+            item_ids.add(item["id"])
+            items_out.append(item)
         return items_out
 
     @classmethod
     def sorted_items_from_pages(cls, pages, item_key, sort_key):
         """Return all items, sorted by specific key.
 
+        Pages requested with ``sort_by=created_at.asc`` are already sorted,
+        and Python's sort finds and merges those runs in linear time.  The
+        sort is stable, so items with equal ``sort_key`` stay in page order.
+
         Args:
             pages(list): Pages from (multiple) API queries.  Raw JSON.
             item_key(str): Top-level key, below which are target items.
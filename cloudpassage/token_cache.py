@@ -0,0 +1,125 @@
+"""TokenCache class.
+
+Share OAuth tokens between HaloSession objects in different processes.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import time
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+# os.replace() overwrites an existing file on Windows, but is Python 3 only.
+replace_file = getattr(os, "replace", os.rename)
+
+
+class TokenCache(object):
+    """File-based OAuth token cache, shared by sibling processes.
+
+    Tokens are keyed by API key ID and API hostname, and are reused by any
+    :class:`cloudpassage.HaloSession` configured with the same cache file
+    until they expire.  A lock file serializes authentication between
+    processes, so when many workers start at once, only one of them requests
+    a token and the rest read it from the cache.
+
+    The cache file is created with permissions 0600, as it contains bearer
+    tokens.  On platforms without ``fcntl`` (Windows), the cache is used
+    without locking.
+
+    Example::
+
+        cache = cloudpassage.TokenCache("/var/run/myapp/halo_tokens.json")
+        session = cloudpassage.HaloSession(key, secret, token_cache=cache)
+
+    Args:
+        path (str): Path to the cache file.  The lock file is this path,
+            with ``.lock`` appended.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock_path = path + ".lock"
+
+    @classmethod
+    def cache_key(cls, key_id, api_host):
+        """Return the cache key for a set of API credentials."""
+        combined = "{}@{}".format(key_id, api_host).encode("utf-8")
+        return hashlib.sha256(combined).hexdigest()
+
+    @contextlib.contextmanager
+    def lock(self):
+        """Hold an exclusive, cross-process lock on the cache."""
+        if fcntl is None:
+            yield
+            return
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def read(self):
+        """Return the contents of the cache file as a dict."""
+        try:
+            with open(self.path, "r") as cache_file:
+                return json.load(cache_file)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def write(self, contents):
+        """Atomically replace the contents of the cache file."""
+        tmp_path = "{}.{}.tmp".format(self.path, os.getpid())
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as cache_file:
+            json.dump(contents, cache_file)
+        replace_file(tmp_path, self.path)
+        return None
+
+    def get(self, key_id, api_host, min_ttl=0):
+        """Return a cached token, if it has at least ``min_ttl`` remaining.
+
+        Args:
+            key_id (str): API key ID.
+            api_host (str): API hostname.
+            min_ttl (int): Minimum remaining lifetime in seconds.
+
+        Returns:
+            tuple: token, scope, expires_at.  expires_at is a UNIX timestamp,
+                or None if the token's lifetime is unknown.  None is returned
+                instead of a tuple if there is no usable token.
+        """
+        entry = self.read().get(self.cache_key(key_id, api_host))
+        if entry is None:
+            return None
+        expires_at = entry.get("expires_at")
+        if expires_at is not None and expires_at - time.time() <= min_ttl:
+            return None
+        return entry["token"], entry.get("scope"), expires_at
+
+    def put(self, key_id, api_host, token, scope, expires_at):
+        """Store a token in the cache, dropping any expired entries.
+
+        Args:
+            key_id (str): API key ID.
+            api_host (str): API hostname.
+            token (str): OAuth token.
+            scope (str): OAuth token scope.
+            expires_at (float): UNIX timestamp for token expiration, or None.
+        """
+        now = time.time()
+        contents = {}
+        for key, entry in self.read().items():
+            if entry.get("expires_at") is None or entry["expires_at"] > now:
+                contents[key] = entry
+        contents[self.cache_key(key_id, api_host)] = {"token": token,
+                                                      "scope": scope,
+                                                      "expires_at": expires_at}
+        self.write(contents)
+        return None
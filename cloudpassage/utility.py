@@ -17,6 +17,11 @@ from .sanity import is_it_a_string
 
 
 class Utility(object):
+    iso8601_rx = re.compile(r"^(\d{4})-(\d{2})-(\d{2})"
+                            r"(?:[T ](\d{2}):(\d{2})"
+                            r"(?::(\d{2})(?:\.(\d+))?)?)?"
+                            r"(Z|[+-]\d{2}:?\d{2})?$")
+
     @classmethod
     def determine_policy_metadata(cls, policy):
         """Return dict of policy type, name, and target platform.
@@ -156,6 +161,17 @@ class Utility(object):
             return(False, fail_msg)
         return(valid, fail_msg)
 
+    @classmethod
+    def ensure_pool_capacity(cls, session, size):
+        """Size the session's connection pool for ``size`` threads.
+
+        Sessions which only implement ``interact()`` are left as they are.
+        """
+        ensure_pool_capacity = getattr(session, "ensure_pool_capacity", None)
+        if ensure_pool_capacity is not None:
+            ensure_pool_capacity(size)
+        return None
+
     @classmethod
     def parse_status(cls, url, resp_code, resp_text):
         """Parse status from HTTP response"""
@@ -208,6 +224,67 @@ class Utility(object):
                       original_time.microsecond)
         return "%04d-%02d-%02dT%02d:%02d:%02d.%06dZ" % time_split
 
+    @classmethod
+    def iso8601_to_datetime(cls, timestamp):
+        """Converts an ISO 8601 formatted string to a datetime object.
+
+        Accepts dates, and date-times with optional fractional seconds and
+        UTC offset.  Timestamps with an offset are converted to UTC.
+
+        Args:
+            timestamp (str): ISO 8601 formatted string
+
+        Returns:
+            datetime.datetime: Naive datetime object, in UTC.
+
+        Raises:
+            CloudPassageValidation: ``timestamp`` can't be parsed.
+
+        """
+        match = cls.iso8601_rx.match(timestamp)
+        if match is None:
+            exc_msg = "Unsupported timestamp format: %s" % timestamp
+            raise CloudPassageValidation(exc_msg)
+        (year, month, day, hour, minute, second, fraction,
+         offset) = match.groups()
+        result = datetime.datetime(int(year), int(month), int(day),
+                                   int(hour or 0), int(minute or 0),
+                                   int(second or 0),
+                                   int((fraction or "0")[:6].ljust(6, "0")))
+        if offset not in [None, "Z"]:
+            offset = offset.replace(":", "")
+            delta = datetime.timedelta(hours=int(offset[1:3]),
+                                       minutes=int(offset[3:5]))
+            result = result - delta if offset[0] == "+" else result + delta
+        return result
+
+    @classmethod
+    def split_time_range(cls, since, until, window_size):
+        """Split a time range into consecutive windows.
+
+        Each window ends where the next one begins, and the last window ends
+        at ``until``.
+
+        Args:
+            since (str): ISO 8601 formatted start of range
+            until (str): ISO 8601 formatted end of range
+            window_size (int): Length of each window, in seconds
+
+        Returns:
+            list: List of (since, until) tuples of ISO 8601 formatted strings.
+
+        """
+        start = cls.iso8601_to_datetime(since)
+        end = cls.iso8601_to_datetime(until)
+        step = datetime.timedelta(seconds=window_size)
+        windows = []
+        while start < end:
+            window_end = min(start + step, end)
+            windows.append((cls.datetime_to_8601(start),
+                            cls.datetime_to_8601(window_end)))
+            start = window_end
+        return windows
+
     @classmethod
     def verify_python_version(cls, act_version, target_version):
         """Verifies that the installed version of Python meets requirements
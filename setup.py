@@ -32,6 +32,9 @@ setup(
     url="http://github.com/cloudpassage/cloudpassage-halo-python-sdk",
     packages=["cloudpassage"],
     install_requires=["requests>=2.18", "pyaml"],
+    extras_require={"async": ["aiohttp>=3.5"],
+                    "fastjson": ["orjson; python_version >= '3.6'",
+                                 "ujson; python_version < '3.6'"]},
     long_description=get_long_description(["README.rst", "CHANGELOG.rst"]),
     classifiers=[
         "Development Status :: 5 - Production/Stable",
@@ -0,0 +1,125 @@
+"""Fakes shared by the unit tests, standing in for the Halo API."""
+
+import json
+import threading
+import time
+
+
+class FakeResponse(object):
+    """Stands in for requests.Response."""
+
+    def __init__(self, body, status_code=200):
+        self.body = body
+        self.status_code = status_code
+        self.text = json.dumps(body)
+
+    def json(self):
+        return self.body
+
+
+class FakeAuthClient(object):
+    """Stands in for requests.Session, counting token requests.
+
+    Tokens are issued as tok1, tok2, ...  Requests made with one of the
+    first ``rejected_tokens`` tokens are answered with 401.  Otherwise,
+    requests succeed.
+    """
+
+    def __init__(self, expires_in=900, rejected_tokens=0):
+        self.headers = {}
+        self.auth_calls = 0
+        self.expires_in = expires_in
+        self.rejected_tokens = rejected_tokens
+        self.lock = threading.Lock()
+
+    def post(self, url, headers=None, data=None, timeout=None):
+        with self.lock:
+            self.auth_calls += 1
+            token = "tok%s" % self.auth_calls
+        time.sleep(0.05)
+        return FakeResponse({"access_token": token, "scope": "rw",
+                             "expires_in": self.expires_in})
+
+    def get(self, url, params=None, timeout=None):
+        token_num = int(self.headers["Authorization"].split("tok")[1])
+        if token_num <= self.rejected_tokens:
+            return FakeResponse({}, 401)
+        return FakeResponse({"ok": True})
+
+    put = delete = get
+
+
+class FakeConnection(object):
+    """Stands in for HaloSession, as used by HttpHelper and the endpoints.
+
+    Subclasses override :meth:`respond`, returning the body of the response
+    to each request.  Endpoints and keyword args of requests are recorded
+    in ``requested`` and ``request_args``.
+    """
+
+    def __init__(self):
+        self.requested = []
+        self.request_args = []
+        self.pool_size = 1
+        self.lock = threading.Lock()
+
+    def ensure_pool_capacity(self, size):
+        with self.lock:
+            self.pool_size = max(size, self.pool_size)
+
+    def interact(self, verb, endpoint, params=None, reqbody=None, **kwargs):
+        with self.lock:
+            self.requested.append(endpoint)
+            self.request_args.append(kwargs)
+        return FakeResponse(self.respond(verb, endpoint, params, reqbody))
+
+    def respond(self, verb, endpoint, params, reqbody):
+        """Return the body of the response.  Empty, unless overridden."""
+        return {}
+
+
+class MinimalConnection(object):
+    """Connection offering only interact(), like a user-supplied session."""
+
+    def __init__(self, connection):
+        self.interact = connection.interact
+
+
+def get_page_number(endpoint):
+    """Return the page number requested by a pagination link."""
+    if "page=" not in endpoint:
+        return 1
+    return int(endpoint.split("page=")[1].split("&")[0])
+
+
+def build_page(key, items, page, per_page, next_url=None):
+    """Return the body of one page of ``items``, as the API would.
+
+    ``next_url`` is formatted with the number of the next page, and linked
+    if there are more items.
+    """
+    body = {"count": len(items),
+            key: items[(page - 1) * per_page:page * per_page]}
+    if next_url is not None and page * per_page < len(items):
+        body["pagination"] = {"next": next_url % (page + 1)}
+    return body
+
+
+class PagingConnection(FakeConnection):
+    """Serves pages of ten numbered items, following pagination links.
+
+    The query params of each request are recorded in ``params``.
+    """
+
+    def __init__(self, total_pages, key="things", path="/v1/things"):
+        FakeConnection.__init__(self)
+        self.items = [{"id": x} for x in range(total_pages * 10)]
+        self.key = key
+        self.path = path
+        self.params = []
+
+    def respond(self, verb, endpoint, params, reqbody):
+        self.params.append(params)
+        nxt = "https://api.nonexist.cloudpassage.com%s?page=%%s" % self.path
+        return build_page(self.key, self.items, get_page_number(endpoint),
+                          10, nxt)
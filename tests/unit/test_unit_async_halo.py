@@ -0,0 +1,225 @@
+import cloudpassage
+import json
+import pytest
+import sys
+from fakes import PagingConnection
+
+
+class FakeAsyncConnection(PagingConnection):
+    """Serves pages of ten numbered items, as awaitable responses."""
+
+    def interact(self, verb, endpoint, params=None, reqbody=None):
+        import asyncio
+        result = asyncio.get_event_loop().create_future()
+        result.set_result(PagingConnection.interact(self, verb, endpoint,
+                                                    params, reqbody))
+        return result
+
+
+class FakeAiohttpResponse(object):
+    """Response from FakeAiohttpClient, usable as an async context manager.
+
+    Awaiting it yields to the event loop, as a real request would.
+    """
+
+    def __init__(self, status, body=None, exception=None):
+        self.status = status
+        self.headers = {}
+        self.body = json.dumps(body or {}).encode()
+        self.exception = exception
+
+    def later(self, value=None, exception=None):
+        import asyncio
+        result = asyncio.get_event_loop().create_future()
+        if exception is not None:
+            result.get_loop().call_soon(result.set_exception, exception)
+        else:
+            result.get_loop().call_soon(result.set_result, value)
+        return result
+
+    def __aenter__(self):
+        return self.later(self, self.exception)
+
+    def __aexit__(self, exc_type, exc_value, traceback):
+        return self.later(False)
+
+    def read(self):
+        return self.later(self.body)
+
+
+class FakeAiohttpClient(object):
+    """Stands in for aiohttp.ClientSession.
+
+    Tokens are issued as tok1, tok2, ... and the first ``rejected_tokens``
+    are answered with 401.  Otherwise, each request to a path pops the next
+    outcome from ``outcomes[path]``: a status code, or an exception to
+    raise.  Once those run out, requests succeed.
+    """
+
+    closed = False
+
+    def __init__(self, outcomes=None, rejected_tokens=0):
+        self.outcomes = outcomes or {}
+        self.rejected_tokens = rejected_tokens
+        self.auth_calls = 0
+        self.requested = []
+
+    def post(self, endpoint, headers=None, proxy=None):
+        self.auth_calls += 1
+        return FakeAiohttpResponse(200, {"access_token": "tok%s" %
+                                         self.auth_calls,
+                                         "expires_in": 900})
+
+    def request(self, verb, url, headers=None, proxy=None, **kwargs):
+        from urllib.parse import urlparse
+        path = urlparse(url).path
+        self.requested.append((verb, path))
+        token_num = int(headers["Authorization"].split("tok")[1])
+        if token_num <= self.rejected_tokens:
+            return FakeAiohttpResponse(401)
+        outcomes = self.outcomes.get(path, [])
+        outcome = outcomes.pop(0) if outcomes else 200
+        if isinstance(outcome, BaseException):
+            return FakeAiohttpResponse(None, exception=outcome)
+        return FakeAiohttpResponse(outcome, {"path": path})
+
+    def close(self):
+        return FakeAiohttpResponse(None).later()
+
+
+def async_session(client, **kwargs):
+    session = cloudpassage.AsyncHaloSession("abc", "def", **kwargs)
+    session.backoff_factor = 0
+    session.client = client
+    return session
+
+
+def run(coroutine):
+    import asyncio
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def run_all(coroutines):
+    import asyncio
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(asyncio.gather(*coroutines))
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+@pytest.mark.skipif(sys.version_info < (3, 6), reason="Requires Python 3.6")
+class TestUnitAsyncHaloSession:
+    def test_interact_authenticates(self):
+        client = FakeAiohttpClient()
+        session = async_session(client)
+        response = run(session.interact("get", "/v1/servers"))
+        assert response.json() == {"path": "/v1/servers"}
+        assert client.auth_calls == 1
+        assert session.auth_token == "tok1"
+
+    def test_retries_retry_statuses(self):
+        client = FakeAiohttpClient({"/v1/servers": [503, 429, 500]})
+        session = async_session(client)
+        response = run(session.interact("get", "/v1/servers"))
+        assert response.status_code == 200
+        assert len(client.requested) == 4
+
+    def test_retries_stop_at_max_retries(self):
+        client = FakeAiohttpClient({"/v1/servers": [503] * 10})
+        session = async_session(client)
+        session.max_retries = 2
+        with pytest.raises(cloudpassage.CloudPassageGeneral):
+            run(session.interact("get", "/v1/servers"))
+        assert len(client.requested) == 3
+
+    def test_burst_of_401s_reauthenticates_once(self):
+        client = FakeAiohttpClient(rejected_tokens=1)
+        session = async_session(client)
+        responses = run_all([session.interact("get", "/v1/servers")
+                             for _ in range(10)])
+        assert all(x.status_code == 200 for x in responses)
+        assert client.auth_calls == 2
+        assert session.auth_token == "tok2"
+
+    def test_parse_status_raises(self):
+        client = FakeAiohttpClient({"/v1/servers/nope": [404]})
+        session = async_session(client)
+        with pytest.raises(cloudpassage.CloudPassageResourceExistence):
+            run(session.interact("get", "/v1/servers/nope"))
+        assert len(client.requested) == 1
+
+    def test_retries_connection_errors(self):
+        import aiohttp
+        client = FakeAiohttpClient(
+            {"/v1/servers": [aiohttp.ServerDisconnectedError(), 503]})
+        session = async_session(client)
+        response = run(session.interact("get", "/v1/servers"))
+        assert response.status_code == 200
+        assert len(client.requested) == 3
+
+    def test_connection_errors_not_retried_for_post(self):
+        import aiohttp
+        client = FakeAiohttpClient(
+            {"/v1/servers": [aiohttp.ServerDisconnectedError()]})
+        session = async_session(client)
+        with pytest.raises(aiohttp.ServerDisconnectedError):
+            run(session.interact("post", "/v1/servers", reqbody={}))
+        assert len(client.requested) == 1
+
+    def test_cancelled_probe_releases_circuit(self):
+        import asyncio
+        client = FakeAiohttpClient(
+            {"/v1/servers": [503, asyncio.CancelledError()]})
+        session = async_session(client, circuit_breaker_threshold=1,
+                                circuit_breaker_timeout=0)
+        session.max_retries = 0
+        url = session.build_endpoint_prefix() + "/v1/servers"
+        with pytest.raises(cloudpassage.CloudPassageGeneral):
+            run(session.interact("get", "/v1/servers"))
+        with pytest.raises(asyncio.CancelledError):
+            run(session.interact("get", "/v1/servers"))
+        assert session.circuit_breaker.get_state(url) == "half-open"
+        response = run(session.interact("get", "/v1/servers"))
+        assert response.status_code == 200
+        assert session.circuit_breaker.get_state(url) == "closed"
+
+    def test_connection_errors_stop_at_max_retries(self):
+        import asyncio
+        client = FakeAiohttpClient(
+            {"/v1/servers": [asyncio.TimeoutError() for _ in range(10)]})
+        session = async_session(client)
+        session.max_retries = 2
+        with pytest.raises(asyncio.TimeoutError):
+            run(session.interact("get", "/v1/servers"))
+        assert len(client.requested) == 3
+
+
+@pytest.mark.skipif(sys.version_info < (3, 6), reason="Requires Python 3.6")
+class TestUnitAsyncHttpHelper:
+    def test_get_paginated(self):
+        connection = FakeAsyncConnection(5)
+        helper = cloudpassage.AsyncHttpHelper(connection)
+        result = run(helper.get_paginated("/v1/things", "things", 10))
+        assert [x["id"] for x in result] == list(range(50))
+
+    def test_get_paginated_prefetch(self):
+        connection = FakeAsyncConnection(12)
+        helper = cloudpassage.AsyncHttpHelper(connection)
+        result = run(helper.get_paginated("/v1/things", "things", 10,
+                                          prefetch=4))
+        assert [x["id"] for x in result] == list(range(100))
+        assert len(connection.requested) == 10
+
+    def test_list_all_async(self):
+        connection = FakeAsyncConnection(3)
+        endpoint = cloudpassage.Server(connection)
+        endpoint.objects_name = "things"
+        result = run(endpoint.list_all_async())
+        assert len(result) == 30
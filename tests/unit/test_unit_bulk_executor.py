@@ -0,0 +1,73 @@
+import cloudpassage
+import threading
+import time
+from fakes import FakeConnection
+from fakes import MinimalConnection
+
+
+class FakeSession(object):
+    def __init__(self):
+        self.pool_size = 1
+
+    def ensure_pool_capacity(self, size):
+        self.pool_size = max(size, self.pool_size)
+
+
+class TestUnitBulkExecutor:
+    def test_run_captures_errors(self):
+        def lookup(object_id, suffix=""):
+            if object_id % 5 == 0:
+                raise ValueError("bad id %s" % object_id)
+            return "%s%s" % (object_id, suffix)
+
+        session = FakeSession()
+        executor = cloudpassage.BulkExecutor(session, concurrency=4)
+        results = list(executor.run(lookup, range(20), suffix="!"))
+        assert session.pool_size == 4
+        assert sorted([x[0] for x in results]) == list(range(20))
+        for object_id, result, exc in results:
+            if object_id % 5 == 0:
+                assert result is None
+                assert isinstance(exc, ValueError)
+            else:
+                assert result == "%s!" % object_id
+                assert exc is None
+
+    def test_run_is_concurrent_and_bounded(self):
+        lock = threading.Lock()
+        state = {"running": 0, "peak": 0, "consumed": 0}
+
+        def slow(object_id):
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(0.02)
+            with lock:
+                state["running"] -= 1
+            return object_id
+
+        def ids():
+            for object_id in range(40):
+                # Never more than concurrency * 2 ahead of the consumer.
+                assert object_id - state["consumed"] <= 6
+                yield object_id
+
+        executor = cloudpassage.BulkExecutor(FakeSession(), concurrency=3)
+        for _ in executor.run(slow, ids()):
+            state["consumed"] += 1
+        assert state["consumed"] == 40
+        assert state["peak"] == 3
+
+    def test_endpoint_fan_out_interact_only_session(self):
+        server = cloudpassage.Server(MinimalConnection(FakeConnection()))
+        server.describe = lambda server_id: {"id": server_id}
+        results = list(server.fan_out("describe", ["a"]))
+        assert results == [("a", {"id": "a"}, None)]
+
+    def test_endpoint_fan_out(self):
+        server = cloudpassage.Server(FakeSession())
+        server.describe = lambda server_id: {"id": server_id}
+        results = sorted(server.fan_out("describe", ["a", "b"],
+                                        concurrency=2))
+        assert results == [("a", {"id": "a"}, None),
+                           ("b", {"id": "b"}, None)]
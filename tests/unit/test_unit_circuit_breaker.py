@@ -0,0 +1,57 @@
+import cloudpassage
+import pytest
+import time
+
+
+url = "https://api.cloudpassage.com:443/v1/servers/abc/issues?page=2"
+
+
+class TestUnitCircuitBreaker:
+    def test_circuit_key(self):
+        key = cloudpassage.CircuitBreaker.get_circuit_key(url)
+        assert key == "/v1/servers"
+
+    def test_opens_after_threshold(self):
+        breaker = cloudpassage.CircuitBreaker(3)
+        for _ in range(2):
+            breaker.record_failure(url)
+        breaker.before_request(url)
+        breaker.record_failure(url)
+        assert breaker.get_state(url) == "open"
+        with pytest.raises(cloudpassage.CloudPassageCircuitOpen):
+            breaker.before_request(url)
+        breaker.before_request("https://api.cloudpassage.com/v1/events")
+
+    def test_success_resets_count(self):
+        breaker = cloudpassage.CircuitBreaker(2)
+        breaker.record_failure(url)
+        breaker.record_success(url)
+        breaker.record_failure(url)
+        assert breaker.get_state(url) == "closed"
+
+    def test_half_open_probe(self):
+        breaker = cloudpassage.CircuitBreaker(1, reset_timeout=0.1)
+        breaker.record_failure(url)
+        time.sleep(0.15)
+        assert breaker.get_state(url) == "half-open"
+        breaker.before_request(url)  # The probe
+        with pytest.raises(cloudpassage.CloudPassageCircuitOpen):
+            breaker.before_request(url)
+        breaker.record_failure(url)
+        assert breaker.get_state(url) == "open"
+        time.sleep(0.15)
+        breaker.before_request(url)
+        breaker.record_success(url)
+        assert breaker.get_state(url) == "closed"
+
+    def test_release_probe(self):
+        breaker = cloudpassage.CircuitBreaker(1, reset_timeout=0.1)
+        assert breaker.before_request(url) is False
+        breaker.record_failure(url)
+        time.sleep(0.15)
+        assert breaker.before_request(url) is True
+        with pytest.raises(cloudpassage.CloudPassageCircuitOpen):
+            breaker.before_request(url)
+        breaker.release_probe(url)
+        assert breaker.get_state(url) == "half-open"
+        assert breaker.before_request(url) is True
@@ -1,5 +1,6 @@
 import cloudpassage
 import os
+from fakes import PagingConnection
 
 config_file_name = "portal.yaml.local"
 tests_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
@@ -15,3 +16,12 @@ class TestUnitEvent:
     def test_create_event_obj(self):
         session = cloudpassage.Event(None)
         assert session
+
+    def test_list_all_stream(self):
+        session = PagingConnection(3, "events", "/v1/events")
+        events = cloudpassage.Event(session).list_all(2, stream=True,
+                                                      prefetch=2)
+        assert not isinstance(events, list)
+        assert [x["id"] for x in events] == list(range(20))
+        assert "stream" not in (session.params[0] or {})
+        assert "prefetch" not in (session.params[0] or {})
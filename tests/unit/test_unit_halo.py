@@ -1,6 +1,19 @@
 import cloudpassage
+import gc
 import os
+import pytest
 import re
+import requests
+import socket
+import threading
+import time
+import weakref
+from fakes import FakeAuthClient
+from fakes import FakeResponse
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
 
 
 config_file_name = "portal.yaml.local"
@@ -98,3 +111,249 @@ class TestUnitHaloSession:
                                            proxy_port=proxy_port)
         assert ((session.proxy_host == proxy_host) and
                 (session.proxy_port == proxy_port))
+
+    def test_request_auth_token_expires_in(self):
+        session = cloudpassage.HaloSession(key_id, secret_key)
+        session.client = FakeAuthClient(rejected_tokens=1)
+        endpoint, headers = session.build_auth_request()
+        token, scope, expires_in = session.request_auth_token(endpoint,
+                                                              headers)
+        assert (token, scope, expires_in) == ("tok1", "rw", 900)
+
+    def test_set_auth_token_schedules_refresh(self):
+        session = cloudpassage.HaloSession(key_id, secret_key,
+                                           background_token_refresh=False)
+        session.set_auth_token("abc", "rw", 900)
+        assert session.token_expiring() is False
+        assert session.auth_refresh_timer is None
+        session.set_auth_token("abc", "rw", 1)
+        time.sleep(0.6)
+        assert session.token_expiring() is True
+
+    def test_background_token_refresh(self):
+        session = cloudpassage.HaloSession(key_id, secret_key)
+        session.client = FakeAuthClient(expires_in=0.4, rejected_tokens=1)
+        session.client.close = lambda: None
+        session.interact("get", "/v1/servers")
+        assert session.auth_token == "tok2"
+        time.sleep(0.5)
+        assert session.auth_token == "tok3"
+        session.close()
+        assert session.auth_refresh_timer is None
+
+    def test_background_token_refresh_skips_idle_session(self):
+        session = cloudpassage.HaloSession(key_id, secret_key)
+        session.client = FakeAuthClient(expires_in=0.4, rejected_tokens=1)
+        session.client.close = lambda: None
+        session.authenticate_client()
+        time.sleep(0.5)
+        assert session.auth_token == "tok1"
+        assert session.client.auth_calls == 1
+        session.close()
+
+    def test_background_token_refresh_does_not_leak_session(self):
+        session = cloudpassage.HaloSession(key_id, secret_key)
+        client = FakeAuthClient(expires_in=0.4, rejected_tokens=1)
+        session.client = client
+        session.interact("get", "/v1/servers")
+        timer = session.auth_refresh_timer
+        session_ref = weakref.ref(session)
+        del session
+        gc.collect()
+        assert session_ref() is None
+        timer.join()
+        assert client.auth_calls == 2
+
+    def test_concurrent_reauth_is_coalesced(self):
+        session = cloudpassage.HaloSession(key_id, secret_key,
+                                           background_token_refresh=False)
+        session.client = FakeAuthClient(rejected_tokens=1)
+        session.authenticate_client()
+        url = session.build_endpoint_prefix() + "/v1/servers"
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+                       session.try_wrapper("get", url, None, None)[0]))
+                   for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == [True] * 10
+        assert session.client.auth_calls == 2
+
+    def test_pool_settings(self):
+        session = cloudpassage.HaloSession(key_id, secret_key,
+                                           pool_maxsize=4, pool_block=True,
+                                           keep_alive=False)
+        assert session.halo_http_adapter._pool_maxsize == 4
+        assert session.halo_http_adapter._pool_block is True
+        assert session.client.headers["Connection"] == "close"
+
+    def test_ensure_pool_capacity(self):
+        session = cloudpassage.HaloSession(key_id, secret_key)
+        original_adapter = session.halo_http_adapter
+        session.ensure_pool_capacity(5)
+        assert session.halo_http_adapter is original_adapter
+        session.ensure_pool_capacity(32)
+        assert session.pool_maxsize == 32
+        adapter = session.client.get_adapter(session.session_mount + "/v1/x")
+        assert adapter._pool_maxsize == 32
+
+    def test_circuit_breaker_fails_fast(self):
+        session = cloudpassage.HaloSession(key_id, secret_key,
+                                           background_token_refresh=False,
+                                           circuit_breaker_threshold=2)
+        session.client = FakeAuthClient(rejected_tokens=1)
+        session.authenticate_client()
+        session.auth_token = "tok2"
+        calls = []
+
+        def failing_get(url, params=None, timeout=None):
+            calls.append(url)
+            return FakeResponse({}, 503)
+
+        url = session.build_endpoint_prefix() + "/v1/servers"
+        for _ in range(2):
+            success = session.get_response(failing_get, "get", url, None,
+                                           None)[0]
+            assert success is False
+        with pytest.raises(cloudpassage.CloudPassageCircuitOpen):
+            session.get_response(failing_get, "get", url, None, None)
+        assert len(calls) == 2
+
+    def test_circuit_breaker_unrecorded_probe(self):
+        session = cloudpassage.HaloSession(key_id, secret_key,
+                                           background_token_refresh=False,
+                                           circuit_breaker_threshold=1,
+                                           circuit_breaker_timeout=0)
+        session.auth_token = "tok2"
+        outcomes = [FakeResponse({}, 503),
+                    requests.exceptions.ChunkedEncodingError("truncated"),
+                    FakeResponse({"ok": True})]
+
+        def flaky_get(url, params=None, timeout=None):
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        url = session.build_endpoint_prefix() + "/v1/servers"
+        assert session.get_response(flaky_get, "get", url, None,
+                                    None)[0] is False
+        with pytest.raises(requests.exceptions.ChunkedEncodingError):
+            session.get_response(flaky_get, "get", url, None, None)
+        assert session.circuit_breaker.get_state(url) == "half-open"
+        assert session.get_response(flaky_get, "get", url, None,
+                                    None)[0] is True
+        assert session.circuit_breaker.get_state(url) == "closed"
+
+    def test_circuit_breaker_ignores_rate_limiting(self):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(int(self.path.split("/")[-1]))
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"{}")
+
+            def log_message(self, *args):
+                pass
+
+        server = HTTPServer(("127.0.0.1", 0), Handler)
+        server_thread = threading.Thread(target=server.serve_forever)
+        server_thread.daemon = True
+        server_thread.start()
+        session = cloudpassage.HaloSession(key_id, secret_key,
+                                           background_token_refresh=False,
+                                           circuit_breaker_threshold=2)
+        session.max_retries = 1
+        session.backoff_factor = 0
+        session.build_client()
+        session.auth_token = "tok2"
+        session.session_mount = "http://127.0.0.1:%s" % (
+            server.server_address[1])
+        session.mount_http_adapter()
+        try:
+            for _ in range(3):
+                success, response, exception = session.get_response(
+                    session.client.get, "get",
+                    session.session_mount + "/v1/429", None, None)
+                assert response.status_code == 429
+                assert isinstance(exception,
+                                  cloudpassage.CloudPassageRateLimit)
+            for _ in range(2):
+                session.get_response(session.client.get, "get",
+                                     session.session_mount + "/v1/503",
+                                     None, None)
+            with pytest.raises(cloudpassage.CloudPassageCircuitOpen):
+                session.get_response(session.client.get, "get",
+                                     session.session_mount + "/v1/503",
+                                     None, None)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_request_timeout(self):
+        session = cloudpassage.HaloSession(key_id, secret_key,
+                                           connect_timeout=5,
+                                           read_timeout=30)
+        assert session.get_request_timeout() == (5, 30)
+        assert session.get_request_timeout(7) == (7, 7)
+        connect, read = session.get_request_timeout(
+            deadline=time.time() + 10)
+        assert connect == 5
+        assert 9 < read <= 10
+
+    def test_deadline_passed(self):
+        session = cloudpassage.HaloSession(key_id, secret_key,
+                                           background_token_refresh=False)
+        session.client = FakeAuthClient(rejected_tokens=1)
+        session.authenticate_client()
+        with pytest.raises(cloudpassage.CloudPassageTimeout):
+            session.interact("get", "/v1/servers", deadline=time.time() - 1)
+
+    def test_request_timeout_raises_halo_exception(self):
+        session = cloudpassage.HaloSession(key_id, secret_key)
+        session.auth_token = "tok2"
+
+        def stalled_get(url, params=None, timeout=None):
+            raise requests.exceptions.ReadTimeout("stalled")
+
+        url = session.build_endpoint_prefix() + "/v1/servers"
+        with pytest.raises(cloudpassage.CloudPassageTimeout):
+            session.get_response(stalled_get, "get", url, None, None,
+                                 timeout=1)
+
+    def test_deadline_stops_adapter_retries(self):
+        # A server which accepts connections and never responds.
+        listener = socket.socket()
+        listener.bind(("127.0.0.1", 0))
+        listener.listen(10)
+        accepted = []
+
+        def accept():
+            while True:
+                try:
+                    accepted.append(listener.accept()[0])
+                except socket.error:
+                    return
+
+        acceptor = threading.Thread(target=accept)
+        acceptor.daemon = True
+        acceptor.start()
+        session = cloudpassage.HaloSession(key_id, secret_key,
+                                           background_token_refresh=False)
+        session.auth_token = "tok2"
+        session.session_mount = "http://127.0.0.1:%s" % (
+            listener.getsockname()[1])
+        session.mount_http_adapter()
+        url = session.session_mount + "/v1/servers"
+        started = time.time()
+        try:
+            with pytest.raises(cloudpassage.CloudPassageTimeout):
+                session.get_response(session.client.get, "get", url, None,
+                                     None, deadline=time.time() + 0.5)
+        finally:
+            listener.close()
+            for conn in accepted:
+                conn.close()
+        assert time.time() - started < 2
@@ -0,0 +1,99 @@
+import cloudpassage
+from fakes import MinimalConnection
+from fakes import PagingConnection
+
+
+class TestUnitHttpHelper:
+    def test_get_paginated(self):
+        connection = PagingConnection(5)
+        helper = cloudpassage.HttpHelper(connection)
+        result = helper.get_paginated("/v1/things", "things", 10)
+        assert [x["id"] for x in result] == list(range(50))
+
+    def test_get_paginated_max_pages(self):
+        connection = PagingConnection(5)
+        helper = cloudpassage.HttpHelper(connection)
+        result = helper.get_paginated("/v1/things", "things", 2)
+        assert len(result) == 20
+        assert len(connection.requested) == 2
+
+    def test_get_paginated_first_page(self):
+        connection = PagingConnection(3)
+        helper = cloudpassage.HttpHelper(connection)
+        first_page = helper.get("/v1/things")
+        result = helper.get_paginated("/v1/things", "things", 10,
+                                      first_page=first_page)
+        assert [x["id"] for x in result] == list(range(30))
+        assert len(connection.requested) == 3
+
+    def test_iter_paginated_is_lazy(self):
+        connection = PagingConnection(5)
+        helper = cloudpassage.HttpHelper(connection)
+        stream = helper.iter_paginated("/v1/things", "things", 10)
+        assert connection.requested == []
+        assert next(stream)["id"] == 0
+        assert len(connection.requested) == 1
+        assert len(list(stream)) == 49
+        assert len(connection.requested) == 5
+
+    def test_iter_paginated_bad_max_pages(self):
+        rejected = False
+        helper = cloudpassage.HttpHelper(PagingConnection(1))
+        try:
+            list(helper.iter_paginated("/v1/things", "things", 301))
+        except cloudpassage.CloudPassageValidation:
+            rejected = True
+        assert rejected
+
+    def test_get_paginated_prefetch(self):
+        connection = PagingConnection(25)
+        helper = cloudpassage.HttpHelper(connection)
+        result = helper.get_paginated("/v1/things", "things", 30, prefetch=4)
+        assert [x["id"] for x in result] == list(range(250))
+        assert len(connection.requested) == 25
+        assert connection.pool_size == 4
+
+    def test_get_paginated_prefetch_without_pool_hook(self):
+        connection = MinimalConnection(PagingConnection(5))
+        helper = cloudpassage.HttpHelper(connection)
+        result = helper.get_paginated("/v1/things", "things", 10, prefetch=4)
+        assert [x["id"] for x in result] == list(range(50))
+
+    def test_get_paginated_prefetch_max_pages(self):
+        connection = PagingConnection(25)
+        helper = cloudpassage.HttpHelper(connection)
+        result = helper.get_paginated("/v1/things", "things", 3, prefetch=4)
+        assert [x["id"] for x in result] == list(range(30))
+
+    def test_get_remaining_page_paths(self):
+        first = {"count": 95}
+        nxt = "/v1/things?per_page=10&page=2"
+        paths = cloudpassage.HttpHelper.get_remaining_page_paths(first, nxt,
+                                                                 50, 300)
+        assert len(paths) == 9
+        assert "page=10" in paths[-1]
+        assert "per_page=10" in paths[-1]
+
+    def test_get_paginated_propagates_deadline(self):
+        connection = PagingConnection(5)
+        helper = cloudpassage.HttpHelper(connection)
+        helper.get_paginated("/v1/things", "things", 10, prefetch=2,
+                             deadline=12345.0, timeout=3)
+        assert connection.request_args == [{"deadline": 12345.0,
+                                            "timeout": 3}] * 5
+        helper.get("/v1/things")
+        assert connection.request_args[-1] == {}
+
+    def test_get_paginated_fields(self):
+        connection = PagingConnection(3)
+        helper = cloudpassage.HttpHelper(connection)
+        result = helper.get_paginated("/v1/things", "things", 10,
+                                      fields=["id", "missing"], prefetch=2)
+        assert result == [{"id": x} for x in range(30)]
+
+    def test_project_fields(self):
+        item = {"id": "abc", "hostname": "web1", "interfaces": [1, 2]}
+        projected = cloudpassage.HttpHelper.project_fields(item,
+                                                           ["id", "hostname"])
+        assert projected == {"id": "abc", "hostname": "web1"}
+        assert "interfaces" in item
@@ -1,5 +1,6 @@
 import cloudpassage
 import os
+from fakes import PagingConnection
 
 
 config_file_name = "portal.yaml.local"
@@ -15,3 +16,18 @@ api_hostname = session_info.api_hostname
 class TestUnitIssue:
     def test_instantiation(self):
         assert cloudpassage.Issue(None)
+
+    def test_list_all_stream(self):
+        session = PagingConnection(3, "issues", "/v3/issues")
+        issues = cloudpassage.Issue(session).list_all(stream=True,
+                                                      status="active")
+        assert not isinstance(issues, list)
+        assert session.requested == []
+        assert [x["id"] for x in issues] == list(range(30))
+        assert session.params[0] == {"status": "active"}
+
+    def test_list_all_prefetch(self):
+        session = PagingConnection(3, "issues", "/v3/issues")
+        issues = cloudpassage.Issue(session).list_all(prefetch=2)
+        assert sorted(x["id"] for x in issues) == list(range(30))
+        assert "prefetch" not in (session.params[0] or {})
@@ -0,0 +1,36 @@
+import cloudpassage
+import json
+import pytest
+
+
+class FakeResponse(object):
+    def __init__(self, content):
+        self.content = content
+
+
+class TestUnitJsonCodec:
+    def test_best_available_round_trip(self):
+        codec = cloudpassage.JsonCodec.best_available()
+        assert codec.name in ["orjson", "ujson", "json"]
+        body = {"servers": [{"id": "abc", "count": 3, "ok": True}]}
+        assert codec.loads(codec.dumps(body)) == body
+        assert codec.loads(json.dumps(body).encode("utf-8")) == body
+
+    def test_dumps_falls_back_to_stdlib(self):
+        def picky_dumps(obj):
+            raise TypeError("Unsupported")
+        codec = cloudpassage.JsonCodec(json.loads, picky_dumps, "picky")
+        assert codec.dumps({1: "a"}) == '{"1": "a"}'
+
+    def test_loads_invalid(self):
+        codec = cloudpassage.JsonCodec.best_available()
+        with pytest.raises(ValueError):
+            codec.loads(b"not json")
+
+    def test_session_codec(self):
+        codec = cloudpassage.JsonCodec()
+        session = cloudpassage.HaloSession("key", "secret", json_codec=codec)
+        assert session.json_codec is codec
+        response = FakeResponse(b'{"issues": []}')
+        helper = cloudpassage.HttpHelper(session)
+        assert helper.decode_json(response) == {"issues": []}
@@ -0,0 +1,49 @@
+import cloudpassage
+import time
+
+
+class TestUnitRateLimiter:
+    def test_token_bucket_burst(self):
+        bucket = cloudpassage.rate_limiter.TokenBucket(10, 3)
+        assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+        assert 0 < bucket.reserve() <= 0.1
+
+    def test_token_bucket_spacing(self):
+        bucket = cloudpassage.rate_limiter.TokenBucket(10, 1)
+        delays = [bucket.reserve() for _ in range(5)]
+        assert delays[0] == 0
+        assert 0.35 < delays[-1] <= 0.4
+
+    def test_endpoint_bucket_longest_prefix(self):
+        limiter = cloudpassage.RateLimiter(endpoint_rates={"/v1": 100,
+                                                           "/v1/events": 1})
+        bucket = limiter.get_endpoint_bucket("/v1/events")
+        assert bucket.rate == 1
+        bucket = limiter.get_endpoint_bucket("/v1/eventsx")
+        assert bucket.rate == 100
+        assert limiter.get_endpoint_bucket("/v2/servers") is None
+
+    def test_reserve_by_url(self):
+        limiter = cloudpassage.RateLimiter(endpoint_rates={"/v1/events": 1})
+        url = "https://api.cloudpassage.com:443/v1/events?page=2"
+        assert limiter.reserve(url) == 0
+        assert limiter.reserve(url) > 0.9
+        assert limiter.reserve("/v1/servers") == 0
+
+    def test_wait(self):
+        limiter = cloudpassage.RateLimiter(20, burst=1)
+        start = time.time()
+        for _ in range(3):
+            limiter.wait("/v1/servers")
+        assert time.time() - start >= 0.09
+
+    def test_session_rate_limit(self):
+        session = cloudpassage.HaloSession("", "", rate_limit=5)
+        assert session.rate_limiter.bucket.rate == 5
+        assert cloudpassage.HaloSession("", "").rate_limiter is None
+
+    def test_token_bucket_try_acquire(self):
+        bucket = cloudpassage.rate_limiter.TokenBucket(0.001, 2)
+        assert [bucket.try_acquire() for _ in range(3)] == [True, True,
+                                                            False]
+        assert bucket.tokens >= 0
@@ -0,0 +1,75 @@
+import cloudpassage
+import pytest
+import time
+from urllib3.exceptions import MaxRetryError
+from urllib3.response import HTTPResponse
+
+
+def make_response(status, headers=None):
+    return HTTPResponse(body=b"", headers=headers or {}, status=status)
+
+
+class TestUnitHaloRetry:
+    def test_next_backoff_bounds(self):
+        last = None
+        for _ in range(50):
+            delay = cloudpassage.HaloRetry.next_backoff(1, last, 10)
+            assert 1 <= delay <= 10
+            if last is not None:
+                assert delay <= max(1, last * 3)
+            last = delay
+
+    def test_backoff_carried_between_retries(self):
+        retry = cloudpassage.HaloRetry(total=5, backoff_factor=1,
+                                       status_forcelist=[500])
+        retry = retry.increment("GET", "/v1/servers", make_response(500))
+        first = retry.get_backoff_time()
+        assert 1 <= first <= 3
+        retry = retry.increment("GET", "/v1/servers", make_response(500))
+        assert retry.last_backoff == first
+
+    def test_rate_limit_reset_seconds(self):
+        headers = {"X-RateLimit-Reset": "7"}
+        assert cloudpassage.HaloRetry.get_rate_limit_reset(headers) == 7
+
+    def test_rate_limit_reset_timestamp(self):
+        headers = {"X-RateLimit-Reset": str(int(time.time()) + 30)}
+        reset = cloudpassage.HaloRetry.get_rate_limit_reset(headers)
+        assert 28 < reset <= 30
+        assert cloudpassage.HaloRetry.get_rate_limit_reset({}) is None
+
+    def test_retry_after_precedence(self):
+        retry = cloudpassage.HaloRetry(total=5)
+        response = make_response(429, {"Retry-After": "3",
+                                       "X-RateLimit-Reset": "9"})
+        assert retry.get_retry_after(response) == 3
+        response = make_response(429, {"X-RateLimit-Reset": "9"})
+        assert retry.get_retry_after(response) == 9
+
+    def test_budget_exhausted(self):
+        budget = cloudpassage.rate_limiter.TokenBucket(0.001, burst=1)
+        retry = cloudpassage.HaloRetry(total=5, status_forcelist=[429],
+                                       budget=budget)
+        retry = retry.increment("GET", "/v1/events", make_response(429))
+        assert retry.budget is budget
+        with pytest.raises(MaxRetryError):
+            retry.increment("GET", "/v1/events", make_response(429))
+
+    def test_deadline_exhausts_retries(self):
+        retry = cloudpassage.HaloRetry(total=5, backoff_factor=10,
+                                       status_forcelist=[500])
+        with cloudpassage.HaloRetry.request_deadline(time.time() + 2):
+            retry = retry.increment("GET", "/v1/events", make_response(500))
+            assert retry.get_backoff_time() <= 2
+        with cloudpassage.HaloRetry.request_deadline(time.time() - 1):
+            with pytest.raises(MaxRetryError):
+                retry.increment("GET", "/v1/events", make_response(500))
+        assert cloudpassage.HaloRetry.get_deadline_remaining() is None
+
+    def test_session_uses_halo_retry(self):
+        session = cloudpassage.HaloSession("key", "secret", retry_budget=30)
+        assert isinstance(session.retries, cloudpassage.HaloRetry)
+        assert session.retries.budget is session.retry_bucket
+        assert session.retry_bucket.capacity == 30
+        session = cloudpassage.HaloSession("key", "secret", retry_budget=None)
+        assert session.retries.budget is None
@@ -1,5 +1,14 @@
 import cloudpassage
+import datetime
 import os
+import pytest
+from fakes import FakeConnection
+from fakes import MinimalConnection
+from fakes import build_page
+try:
+    from urllib.parse import parse_qsl, urlsplit
+except ImportError:
+    from urlparse import parse_qsl, urlsplit
 
 config_file_name = "portal.yaml.local"
 tests_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
@@ -10,6 +19,41 @@ key_id = session_info.key_id
 secret_key = session_info.secret_key
 api_hostname = session_info.api_hostname
 
+start_time = datetime.datetime(2026, 1, 1)
+
+
+class FakeSession(FakeConnection):
+    """Serves one scan per hour for three days, paginated.
+
+    Both ends of the ``since``/``until`` range are inclusive, so adjacent
+    windows share the scan at their boundary.  The page number and match
+    count of each request are recorded in ``served``.
+    """
+
+    def __init__(self):
+        FakeConnection.__init__(self)
+        self.scans = []
+        for hour in range(73):
+            created = start_time + datetime.timedelta(hours=hour)
+            self.scans.append({"id": "scan%02d" % hour,
+                               "created_at": created.strftime(
+                                   "%Y-%m-%dT%H:%M:%S.000000Z")})
+        self.served = []
+
+    def respond(self, verb, endpoint, params, reqbody):
+        if params is None:
+            params = dict(parse_qsl(urlsplit(endpoint).query))
+        assert params["module"] == "svm"
+        page = int(params.get("page", 1))
+        matching = [x for x in self.scans
+                    if params["since"] <= x["created_at"] <= params["until"]]
+        with self.lock:
+            self.served.append((page, len(matching)))
+        query = "&".join("%s=%s" % x for x in sorted(params.items())
+                         if x[0] != "page")
+        return build_page("scans", matching, page, int(params["per_page"]),
+                          "https://nonexist/v1/scans?" + query + "&page=%s")
+
 
 class TestUnitScan:
     def test_instantiation(self):
@@ -60,6 +104,42 @@ class TestUnitScan:
                 accepted = scanner.verify_and_build_module_params(status)
                 assert accepted == status
 
+    def test_iter_scan_history(self):
+        session = FakeSession()
+        scanner = cloudpassage.Scan(session)
+        scans = list(scanner.iter_scan_history(
+            "2026-01-01T00:00:00Z", "2026-01-04T00:00:00Z", module="svm",
+            window_size=6 * 3600, max_threads=3))
+        assert session.pool_size == 3
+        assert scans == session.scans
+        assert len(session.served) == 12
+
+    def test_iter_scan_history_interact_only_session(self):
+        session = FakeSession()
+        scanner = cloudpassage.Scan(MinimalConnection(session))
+        scans = list(scanner.iter_scan_history(
+            "2026-01-01T00:00:00Z", "2026-01-02T00:00:00Z", module="svm"))
+        assert scans == session.scans[:25]
+
+    def test_iter_scan_history_splits_full_windows(self):
+        session = FakeSession()
+        scanner = cloudpassage.Scan(session)
+        scanner.history_per_page = 5
+        scanner.history_max_pages = 2
+        scans = list(scanner.iter_scan_history(
+            "2026-01-01T00:00:00Z", "2026-01-04T00:00:00Z", module="svm"))
+        assert scans == session.scans
+        # Windows too large to retrieve are split after their first page.
+        for page, count in session.served:
+            assert page == 1 or count <= 10
+
+    def test_iter_scan_history_validates(self):
+        scanner = cloudpassage.Scan(FakeSession())
+        with pytest.raises(cloudpassage.CloudPassageValidation):
+            list(scanner.iter_scan_history("2026-01-01T00:00:00Z",
+                                           "2026-01-04T00:00:00Z",
+                                           module="death_stare"))
+
 
 class TestUnitCveException:
     def test_instantiation(self):
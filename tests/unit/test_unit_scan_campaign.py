@@ -0,0 +1,129 @@
+import cloudpassage
+import pytest
+from fakes import FakeConnection
+
+server_ids = ["%032x" % x for x in range(1, 13)]
+
+
+class FakeSession(FakeConnection):
+    """Runs a scan command per server, completing after a number of polls.
+
+    Commands for servers in ``failing`` fail.  Servers in ``unreachable``
+    cannot be scanned at all.  Servers in ``stuck`` never finish.  The
+    first ``flaky`` polls of each command time out.
+    """
+
+    def __init__(self, polls=2, failing=(), unreachable=(), stuck=(),
+                 flaky=0):
+        FakeConnection.__init__(self)
+        self.polls = polls
+        self.failing = failing
+        self.unreachable = unreachable
+        self.stuck = stuck
+        self.flaky = flaky
+        self.poll_counts = {}
+
+    def respond(self, verb, endpoint, params, reqbody):
+        server_id = endpoint.split("/")[3]
+        if server_id in self.unreachable:
+            raise cloudpassage.CloudPassageResourceExistence("gone")
+        if verb == "post":
+            assert reqbody == {"scan": {"module": "svm"}}
+            return {"command": {"id": "cmd-" + server_id}}
+        if "/commands/" in endpoint:
+            assert endpoint.endswith("cmd-" + server_id)
+            with self.lock:
+                count = self.poll_counts.get(server_id, 0) + 1
+                self.poll_counts[server_id] = count
+            if count <= self.flaky:
+                raise cloudpassage.CloudPassageTimeout("slow")
+            count -= self.flaky
+            status = "running"
+            if count >= self.polls and server_id not in self.stuck:
+                status = "completed"
+                if server_id in self.failing:
+                    status = "failed"
+            return {"command": {"id": "cmd-" + server_id,
+                                "status": status}}
+        assert endpoint.endswith("/svm")
+        return {"id": server_id, "scan": {"status": "done"}}
+
+
+def build_campaign(session, **kwargs):
+    return cloudpassage.ScanCampaign(session, "sva", launch_rate=1000,
+                                     min_poll_interval=0.01,
+                                     max_poll_interval=0.02, **kwargs)
+
+
+class TestUnitScanCampaign:
+    def test_unsupported_scan_type(self):
+        with pytest.raises(cloudpassage.CloudPassageValidation):
+            cloudpassage.ScanCampaign(FakeSession(), "sam")
+
+    def test_run(self):
+        session = FakeSession(polls=3, failing=server_ids[:1],
+                              unreachable=server_ids[1:2])
+        campaign = build_campaign(session, max_threads=4)
+        results = {}
+        for server_id, result, exc in campaign.run(server_ids):
+            results[server_id] = (result, exc)
+        assert session.pool_size == 4
+        assert sorted(results.keys()) == server_ids
+        assert isinstance(results[server_ids[0]][1],
+                          cloudpassage.CloudPassageGeneral)
+        assert isinstance(results[server_ids[1]][1],
+                          cloudpassage.CloudPassageResourceExistence)
+        for server_id in server_ids[2:]:
+            assert results[server_id] == ({"id": server_id,
+                                           "scan": {"status": "done"}},
+                                          None)
+            assert session.poll_counts[server_id] == 3
+        progress = campaign.progress()
+        del progress["elapsed"]
+        assert progress == {"total": 12, "launched": 11, "pending": 0,
+                            "completed": 10, "failed": 2, "poll_errors": 0}
+
+    def test_poll_errors_are_retried(self):
+        session = FakeSession(polls=1, flaky=2)
+        campaign = build_campaign(session)
+        results = list(campaign.run(server_ids))
+        assert sorted(x[0] for x in results) == server_ids
+        assert all(x[2] is None for x in results)
+        assert campaign.progress()["poll_errors"] == 24
+
+    def test_poll_errors_give_up_at_limit(self):
+        session = FakeSession(polls=1, flaky=2)
+        campaign = build_campaign(session, max_poll_errors=2)
+        results = list(campaign.run(server_ids))
+        assert len(results) == 12
+        for _, _, exc in results:
+            assert isinstance(exc, cloudpassage.CloudPassageTimeout)
+
+    def test_polls_while_launching(self):
+        session = FakeSession(polls=1)
+        campaign = build_campaign(session)
+        campaign.launch_limiter = cloudpassage.RateLimiter(20, burst=1)
+        launched_at_first_result = None
+        for _ in campaign.run(server_ids):
+            if launched_at_first_result is None:
+                launched_at_first_result = campaign.progress()["launched"]
+        assert launched_at_first_result < len(server_ids)
+        assert campaign.progress()["completed"] == 12
+
+    def test_timeout(self):
+        session = FakeSession(polls=1, stuck=server_ids[:2])
+        campaign = build_campaign(session, timeout=0.1)
+        results = list(campaign.run(server_ids))
+        expired = [x for x in results if x[2] is not None]
+        assert [x[0] for x in expired] == server_ids[:2]
+        for _, _, exc in expired:
+            assert isinstance(exc, cloudpassage.CloudPassageTimeout)
+        assert campaign.progress()["failed"] == 2
+
+    def test_poll_interval_adapts(self):
+        campaign = build_campaign(FakeSession())
+        campaign.wait_for_scans(0)
+        campaign.wait_for_scans(0)
+        assert campaign.poll_interval == 0.02
+        campaign.wait_for_scans(1)
+        assert campaign.poll_interval == 0.01
@@ -25,3 +25,13 @@ class TestUnitServer:
         assert platform is False
         assert kb is False
         assert cve is False
+
+    def test_build_list_params_fields(self):
+        server_object = cloudpassage.Server(None)
+        params = server_object.build_list_params({"state": ["active",
+                                                            "missing"]},
+                                                 ["id", "hostname"])
+        assert params == {"state": "active,missing"}
+        server_object.fields_param = "fields"
+        params = server_object.build_list_params({}, ["id", "hostname"])
+        assert params == {"fields": "id,hostname"}
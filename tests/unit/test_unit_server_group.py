@@ -1,5 +1,9 @@
 import cloudpassage
 import os
+import pytest
+from fakes import FakeConnection
+from fakes import build_page
+from fakes import get_page_number
 
 config_file_name = "portal.yaml.local"
 tests_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
@@ -10,7 +14,92 @@ key_id = session_info.key_id
 secret_key = session_info.secret_key
 api_hostname = session_info.api_hostname
 
+server_ids = ["%032x" % x for x in range(1, 31)]
+group_id = "%032x" % 999
+
+
+class FakeSession(FakeConnection):
+    """Moves servers between groups, failing for the given server IDs.
+
+    Servers in ``failing`` cannot be moved.  Servers in ``lagging`` report
+    their old group when read back, and ``hidden`` servers cannot be read
+    back, or listed, at all.
+    """
+
+    def __init__(self, failing=(), hidden=(), lagging=()):
+        FakeConnection.__init__(self)
+        self.failing = failing
+        self.hidden = hidden
+        self.lagging = lagging
+        self.groups = {}
+
+    def respond(self, verb, endpoint, params, reqbody):
+        if verb == "put":
+            server_id = endpoint.split("/")[-1]
+            if server_id in self.failing:
+                raise cloudpassage.CloudPassageResourceExistence("gone")
+            with self.lock:
+                self.groups[server_id] = reqbody["server"]["group_id"]
+            return {}
+        if endpoint.startswith("/v1/servers/"):
+            server_id = endpoint.split("/")[-1]
+            if server_id in self.hidden:
+                raise cloudpassage.CloudPassageResourceExistence("gone")
+            server_grp = self.groups.get(server_id)
+            if server_id in self.lagging:
+                server_grp = None
+            return {"server": {"id": server_id, "group_id": server_grp}}
+        if "page=" not in endpoint:
+            assert params["group_id"] == group_id
+            assert params["per_page"] == 100
+            assert "max_pages" not in params
+        members = sorted(x for x, grp in self.groups.items()
+                         if grp == group_id and x not in self.hidden)
+        nxt = "https://api.nonexist.cloudpassage.com/v1/servers?page=%s"
+        return build_page("servers", [{"id": x} for x in members],
+                          get_page_number(endpoint), 10, nxt)
+
 
 class TestUnitServerGroup:
     def test_instantiation(self):
         assert cloudpassage.ServerGroup(None)
+
+    def test_list_members_paginated(self):
+        session = FakeSession()
+        for server_id in server_ids:
+            session.groups[server_id] = group_id
+        s_grp = cloudpassage.ServerGroup(session)
+        members = s_grp.list_members(group_id)
+        assert [x["id"] for x in members] == server_ids
+
+    def test_list_members_too_many(self):
+        session = FakeSession()
+        for server_id in server_ids:
+            session.groups[server_id] = group_id
+        s_grp = cloudpassage.ServerGroup(session)
+        with pytest.raises(cloudpassage.CloudPassageValidation):
+            s_grp.list_members(group_id, max_pages=0)
+
+    def test_migrate_servers(self):
+        session = FakeSession()
+        s_grp = cloudpassage.ServerGroup(session)
+        assert s_grp.migrate_servers(group_id, server_ids) == server_ids
+
+    def test_migrate_servers_concurrently(self):
+        failing = server_ids[:2]
+        hidden = server_ids[2:3]
+        lagging = server_ids[3:4]
+        session = FakeSession(failing=failing, hidden=hidden,
+                              lagging=lagging)
+        s_grp = cloudpassage.ServerGroup(session)
+        report = s_grp.migrate_servers_concurrently(group_id, server_ids,
+                                                    concurrency=5)
+        assert session.pool_size == 5
+        assert report["migrated"] == server_ids[4:]
+        assert report["unconfirmed"] == hidden + lagging
+        assert sorted(report["failed"].keys()) == failing
+        for exc in report["failed"].values():
+            assert isinstance(exc, cloudpassage.CloudPassageResourceExistence)
+        # Only the moved servers are read back, not the whole group.
+        assert "/v1/servers" not in session.requested
+        assert len(session.requested) == 2 * len(server_ids) - len(failing)
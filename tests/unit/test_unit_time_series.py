@@ -1,6 +1,18 @@
 import imp
 import os
+import pytest
+import shutil
 import sys
+import tempfile
+import threading
+import time
+from fakes import FakeConnection
+from fakes import MinimalConnection
+from fakes import build_page
+try:
+    from urllib.parse import urlsplit, parse_qsl
+except ImportError:
+    from urlparse import urlsplit, parse_qsl
 
 
 module_name = 'cloudpassage'
@@ -11,6 +23,50 @@ fp, pathname, description = imp.find_module(module_name)
 cloudpassage = imp.load_module(module_name, fp, pathname, description)
 
 
+class FakeSession(FakeConnection):
+    """Serves a fixed list of events, filtered by since/until and paged."""
+
+    def __init__(self, events):
+        FakeConnection.__init__(self)
+        self.events = events
+        self.item_key = "events"
+
+    def respond(self, verb, endpoint, params, reqbody):
+        query = dict(parse_qsl(urlsplit(endpoint).query))
+        if params:
+            query.update(params)
+        matches = [x for x in self.events
+                   if x["created_at"] >= query["since"] and
+                   x["created_at"] <= query.get("until", "9999")]
+        return build_page(self.item_key, matches, int(query.get("page", 1)),
+                          int(query["per_page"]))
+
+
+class GatedSession(FakeSession):
+    """Holds back every page after the first until ``released`` is set."""
+
+    def __init__(self, events):
+        FakeSession.__init__(self, events)
+        self.released = threading.Event()
+        self.held_back = 0
+
+    def respond(self, verb, endpoint, params, reqbody):
+        query = dict(parse_qsl(urlsplit(endpoint).query))
+        if int(query.get("page", 1)) > 1:
+            self.released.wait(5)
+            with self.lock:
+                self.held_back += 1
+        return FakeSession.respond(self, verb, endpoint, params, reqbody)
+
+
+def make_events(count, per_second=1):
+    """Return ``count`` events, ``per_second`` sharing each timestamp."""
+    return [{"id": "event%05d" % x,
+             "created_at": "2020-01-01T00:%02d:%02d.000Z" % divmod(
+                 x // per_second, 60)}
+            for x in range(count)]
+
+
 class TestUnitTimeSeries(object):
     def test_unit_time_series_build_url_list(self):
         path = "/v1/whatever"
@@ -131,3 +187,300 @@ class TestUnitTimeSeries(object):
         expected = -9
         actual = cloudpassage.TimeSeries.get_adjustment_factor(pages, 2, pkey)
         assert expected == actual
+
+    def test_unit_time_series_interact_only_session(self):
+        session = MinimalConnection(FakeSession(make_events(30)))
+        streamer = cloudpassage.TimeSeries(session, "2020-01-01",
+                                           "/v1/events", "events", params={})
+        assert len(streamer.get_next_batch()) == 30
+        streamer.close()
+
+    def test_unit_time_series_reuses_thread_pool(self):
+        session = FakeSession(make_events(120))
+        streamer = cloudpassage.TimeSeries(session, "2020-01-01",
+                                           "/v1/events", "events", params={})
+        ids = []
+        for item in streamer:
+            ids.append(item["id"])
+            if len(ids) == 1:
+                pool = streamer.pool
+            assert streamer.pool is pool
+            if len(ids) == 120:
+                streamer.stop = True
+        assert ids == [x["id"] for x in make_events(120)]
+        assert streamer.pool is None
+
+    def consume(self, streamer, stop_after):
+        ids = []
+        for item in streamer:
+            ids.append(item["id"])
+            if len(ids) >= stop_after:
+                streamer.stop = True
+        return ids
+
+    def check_checkpoint_resume(self, store):
+        events = make_events(300, per_second=7)
+        first = cloudpassage.TimeSeries(FakeSession(events), "2020-01-01",
+                                        "/v1/events", "events", params={},
+                                        checkpoint_store=store)
+        first_ids = self.consume(first, 60)
+        assert store.load("/v1/events")["since"] == events[len(first_ids) -
+                                                           1]["created_at"]
+        second = cloudpassage.TimeSeries(FakeSession(events), "2020-01-01",
+                                         "/v1/events", "events", params={},
+                                         checkpoint_store=store)
+        second_ids = self.consume(second, 300 - len(first_ids))
+        assert first_ids + second_ids == [x["id"] for x in events]
+
+    def test_unit_time_series_file_checkpoint_resume(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, "checkpoint.json")
+            store = cloudpassage.FileCheckpointStore(path)
+            self.check_checkpoint_resume(store)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_unit_time_series_file_checkpoint_overwrite(self):
+        if hasattr(os, "replace"):
+            assert cloudpassage.checkpoint.replace_file is os.replace
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, "checkpoint.json")
+            store = cloudpassage.FileCheckpointStore(path)
+            store.save("/v1/events", "2020-01-01", ["a"])
+            store.save("/v1/events", "2020-01-02", ["b"])
+            assert store.load("/v1/events") == {"since": "2020-01-02",
+                                                "ids": ["b"]}
+            assert os.listdir(tmp_dir) == ["checkpoint.json"]
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_unit_time_series_sqlite_checkpoint_resume(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, "checkpoint.db")
+            store = cloudpassage.SqliteCheckpointStore(path)
+            assert store.load("/v1/events") is None
+            self.check_checkpoint_resume(store)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_unit_time_series_backfill(self):
+        events = make_events(300, per_second=7)
+        session = FakeSession(events)
+        streamer = cloudpassage.TimeSeries(session, "2020-01-01",
+                                           "/v1/events", "events", params={})
+        ids = [x["id"] for x in streamer.backfill("2020-01-01T00:01:00Z",
+                                                  window_size=10)]
+        assert ids == [x["id"] for x in events]
+        assert streamer.params["since"] == events[-1]["created_at"]
+        assert streamer.pool is None
+
+    def test_unit_time_series_idle_backoff(self, monkeypatch):
+        sleeps = []
+        monkeypatch.setattr(cloudpassage.time_series.time, "sleep",
+                            sleeps.append)
+        session = FakeSession(make_events(10))
+        streamer = cloudpassage.TimeSeries(session, "2021-01-01",
+                                           "/v1/events", "events", params={},
+                                           min_poll_interval=0.01,
+                                           max_poll_interval=0.04)
+        for _ in range(4):
+            assert streamer.get_next_batch() == []
+        assert streamer.poll_interval == 0.04
+        assert sleeps
+        streamer.params["since"] = "2020-01-01"
+        assert len(streamer.get_next_batch()) == 10
+        assert streamer.poll_interval == 0.01
+        streamer.close()
+
+    def test_unit_time_series_sort_keeps_page_order_on_ties(self):
+        pages = [{"events": [{"id": "a", "created_at": "1"},
+                             {"id": "b", "created_at": "2"}]},
+                 {"events": [{"id": "c", "created_at": "1"},
+                             {"id": "d", "created_at": "3"}]},
+                 {"events": []}]
+        merged = cloudpassage.TimeSeries.sorted_items_from_pages(
+            pages, "events", "created_at")
+        assert [x["id"] for x in merged] == ["a", "c", "b", "d"]
+
+    def test_unit_time_series_streams_pages_in_order(self):
+        events = make_events(120)
+        session = GatedSession(events)
+        streamer = cloudpassage.TimeSeries(session, "2020-01-01",
+                                           "/v1/events", "events", params={})
+        streamer.batch_size = 3
+        stream = iter(streamer)
+        # The first page is delivered while the later ones are held back.
+        assert next(stream) == events[0]
+        assert session.held_back == 0
+        session.released.set()
+        ids = [events[0]["id"]]
+        for item in stream:
+            ids.append(item["id"])
+            if len(ids) == 120:
+                streamer.stop = True
+        assert ids == [x["id"] for x in events]
+        assert streamer.params["since"] == events[-1]["created_at"]
+
+    def test_unit_time_series_dedupe_across_batches(self, monkeypatch):
+        monkeypatch.setattr(cloudpassage.time_series.time, "sleep",
+                            lambda x: None)
+        events = make_events(3, per_second=3)
+        session = FakeSession(events[:2])
+        streamer = cloudpassage.TimeSeries(session, "2020-01-01",
+                                           "/v1/events", "events", params={},
+                                           min_poll_interval=0)
+        assert streamer.get_next_batch() == events[:2]
+        session.events = events
+        assert streamer.get_next_batch() == events[2:]
+        assert streamer.get_next_batch() == []
+        assert streamer.boundary_ids == set([x["id"] for x in events])
+        session.events = make_events(4, per_second=3)
+        assert [x["id"] for x in streamer.get_next_batch()] == ["event00003"]
+        assert streamer.boundary_ids == set(["event00003"])
+        streamer.close()
+
+    def test_unit_time_series_iter_batches(self):
+        events = make_events(120)
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            store = cloudpassage.FileCheckpointStore(
+                os.path.join(tmp_dir, "checkpoint.json"))
+            streamer = cloudpassage.TimeSeries(FakeSession(events),
+                                               "2020-01-01", "/v1/events",
+                                               "events", params={},
+                                               checkpoint_store=store,
+                                               min_poll_interval=0.01)
+            chunks = []
+            for chunk in streamer.iter_batches(max_items=40,
+                                               max_latency=0.05):
+                chunks.append(chunk)
+                checkpoint = store.load("/v1/events")
+                if len(chunks) < 3:
+                    assert checkpoint is None
+                elif len(chunks) == 3:
+                    # The first API batch was 50 items, all delivered.
+                    assert checkpoint["since"] == events[49]["created_at"]
+                if sum([len(x) for x in chunks]) == 120:
+                    streamer.stop = True
+            assert max([len(x) for x in chunks]) == 40
+            delivered = [x["id"] for chunk in chunks for x in chunk]
+            assert delivered == [x["id"] for x in events]
+            checkpoint = store.load("/v1/events")
+            assert checkpoint["since"] == events[-1]["created_at"]
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_unit_multi_time_series(self):
+        events = make_events(150)
+        issues = [{"id": x["id"].replace("event", "issue"),
+                   "created_at": x["created_at"]} for x in make_events(20)]
+        event_session = FakeSession(events)
+        issue_session = FakeSession(issues)
+        issue_session.item_key = "issues"
+        sources = {"events": cloudpassage.TimeSeries(event_session,
+                                                     "2020-01-01",
+                                                     "/v1/events", "events",
+                                                     params={}),
+                   "issues": cloudpassage.TimeSeries(issue_session,
+                                                     "2020-01-01",
+                                                     "/v3/issues", "issues",
+                                                     params={})}
+        stream = cloudpassage.MultiTimeSeries(sources, max_threads=4)
+        delivered = []
+        batch_sizes = set([])
+        for source, item in stream:
+            delivered.append((source, item["id"]))
+            batch_sizes.add((sources["events"].batch_size,
+                             sources["issues"].batch_size))
+            if len(delivered) == 170:
+                stream.stop = True
+        assert [x[1] for x in delivered if x[0] == "events"] == \
+            [x["id"] for x in events]
+        assert [x[1] for x in delivered if x[0] == "issues"] == \
+            [x["id"] for x in issues]
+        assert (3, 1) in batch_sizes
+        assert stream.pool is None
+
+    def test_unit_multi_time_series_interact_only_session(self):
+        events = make_events(20)
+        session = MinimalConnection(FakeSession(events))
+        sources = {"events": cloudpassage.TimeSeries(session, "2020-01-01",
+                                                     "/v1/events", "events",
+                                                     params={})}
+        stream = cloudpassage.MultiTimeSeries(sources, max_threads=2)
+        delivered = []
+        for source, item in stream:
+            delivered.append(item["id"])
+            if len(delivered) == 20:
+                stream.stop = True
+        assert delivered == [x["id"] for x in events]
+
+    def test_unit_time_series_prefetch_batches(self):
+        events = make_events(300, per_second=7)
+        streamer = cloudpassage.TimeSeries(FakeSession(events), "2020-01-01",
+                                           "/v1/events", "events", params={},
+                                           prefetch_batches=2)
+        assert self.consume(streamer, 300) == [x["id"] for x in events]
+        assert streamer.pool is None
+
+    def test_unit_time_series_prefetch_batches_raises(self):
+        session = FakeSession(make_events(10))
+        session.events = None  # Breaks the fake API
+        streamer = cloudpassage.TimeSeries(session, "2020-01-01",
+                                           "/v1/events", "events", params={},
+                                           prefetch_batches=2)
+        with pytest.raises(TypeError):
+            self.consume(streamer, 10)
+
+    def test_unit_time_series_prefetch_iter_batches(self):
+        events = make_events(120)
+        streamer = cloudpassage.TimeSeries(FakeSession(events), "2020-01-01",
+                                           "/v1/events", "events", params={},
+                                           min_poll_interval=0.01,
+                                           prefetch_batches=2)
+        delivered = []
+        for chunk in streamer.iter_batches(max_items=40, max_latency=0.05):
+            delivered.extend(x["id"] for x in chunk)
+            if len(delivered) == 120:
+                streamer.stop = True
+        assert delivered == [x["id"] for x in events]
+        assert not streamer.producer.is_alive()
+        assert streamer.pool is None
+
+    def test_unit_time_series_prefetch_close_is_bounded(self):
+        session = FakeSession(make_events(10))
+        streamer = cloudpassage.TimeSeries(session, "2020-01-01",
+                                           "/v1/events", "events", params={},
+                                           min_poll_interval=0.01,
+                                           prefetch_batches=1)
+        streamer.producer_join_timeout = 0.1
+        stream = iter(streamer)
+        next(stream)
+        slow_interact = session.interact
+
+        def stalled(*args, **kwargs):
+            time.sleep(1)
+            return slow_interact(*args, **kwargs)
+
+        session.interact = stalled
+        time.sleep(0.1)
+        started = time.time()
+        stream.close()
+        assert time.time() - started < 0.5
+        assert streamer.producer.is_alive()
+        streamer.producer.join()
+        assert streamer.pool is None
+
+    def test_unit_time_series_batch_timeout(self):
+        session = FakeSession(make_events(10))
+        streamer = cloudpassage.TimeSeries(session, "2020-01-01",
+                                           "/v1/events", "events", params={},
+                                           batch_timeout=30)
+        started = time.time()
+        assert len(streamer.get_next_batch()) == 10
+        deadline = session.request_args[-1]["deadline"]
+        assert started + 29 < deadline <= time.time() + 30
+        streamer.close()
@@ -0,0 +1,92 @@
+import cloudpassage
+import os
+import shutil
+import tempfile
+import threading
+import time
+from fakes import FakeAuthClient
+
+
+class TestUnitTokenCache:
+    def setup_method(self, method):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.tmp_dir, "tokens.json")
+
+    def teardown_method(self, method):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_put_get(self):
+        cache = cloudpassage.TokenCache(self.cache_path)
+        expires_at = time.time() + 900
+        cache.put("key", "api.example.com", "tok", "rw", expires_at)
+        assert cache.get("key", "api.example.com") == ("tok", "rw",
+                                                       expires_at)
+        assert cache.get("key", "api.other.com") is None
+        assert oct(os.stat(self.cache_path).st_mode & 0o777) == oct(0o600)
+
+    def test_write_replaces_existing_file(self):
+        if hasattr(os, "replace"):
+            assert cloudpassage.token_cache.replace_file is os.replace
+        cache = cloudpassage.TokenCache(self.cache_path)
+        cache.put("key", "api.example.com", "tok1", "rw", time.time() + 900)
+        cache.put("key", "api.example.com", "tok2", "rw", time.time() + 900)
+        assert cache.get("key", "api.example.com")[0] == "tok2"
+        assert os.listdir(self.tmp_dir) == ["tokens.json"]
+
+    def test_get_expired(self):
+        cache = cloudpassage.TokenCache(self.cache_path)
+        cache.put("key", "api.example.com", "tok", "rw", time.time() + 30)
+        assert cache.get("key", "api.example.com") is not None
+        assert cache.get("key", "api.example.com", min_ttl=60) is None
+
+    def test_sessions_share_token(self):
+        client = FakeAuthClient()
+        sessions = []
+        for _ in range(5):
+            session = cloudpassage.HaloSession("key", "secret",
+                                               token_cache=self.cache_path,
+                                               background_token_refresh=False)
+            session.client = client
+            sessions.append(session)
+        threads = [threading.Thread(target=x.authenticate_client)
+                   for x in sessions]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert client.auth_calls == 1
+        assert set([x.auth_token for x in sessions]) == set(["tok1"])
+
+    def test_missing_directory_falls_back(self):
+        cache_path = os.path.join(self.tmp_dir, "missing", "tokens.json")
+        session = cloudpassage.HaloSession("key", "secret",
+                                           token_cache=cache_path,
+                                           background_token_refresh=False)
+        session.client = FakeAuthClient()
+        assert session.authenticate_client() is True
+        assert session.auth_token == "tok1"
+        assert session.client.auth_calls == 1
+
+    def test_write_failure_keeps_fetched_token(self, monkeypatch):
+        def fail_write(cache, contents):
+            raise OSError(30, "Read-only file system")
+
+        monkeypatch.setattr(cloudpassage.TokenCache, "write", fail_write)
+        session = cloudpassage.HaloSession("key", "secret",
+                                           token_cache=self.cache_path,
+                                           background_token_refresh=False)
+        session.client = FakeAuthClient()
+        assert session.authenticate_client() is True
+        assert session.auth_token == "tok1"
+        assert session.client.auth_calls == 1
+
+    def test_rejected_token_not_reused(self):
+        session = cloudpassage.HaloSession("key", "secret",
+                                           token_cache=self.cache_path,
+                                           background_token_refresh=False)
+        session.client = FakeAuthClient()
+        session.authenticate_client()
+        session.refresh_auth(session.auth_token)
+        assert session.auth_token == "tok2"
+        cache = cloudpassage.TokenCache(self.cache_path)
+        assert cache.get("key", "api.cloudpassage.com")[0] == "tok2"
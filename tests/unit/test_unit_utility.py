@@ -173,3 +173,28 @@ class TestUnitUtility:
         version = utility.get_sdk_version()
         rx = re.compile(r'^\S+\.\S+')
         assert rx.match(version)
+
+    def test_iso8601_to_datetime(self):
+        expected = datetime.datetime(2016, 5, 12, 22, 43, 38, 113000)
+        utc = utility.iso8601_to_datetime("2016-05-12T22:43:38.113Z")
+        offset = utility.iso8601_to_datetime("2016-05-13T00:43:38.113+02:00")
+        date_only = utility.iso8601_to_datetime("2016-05-12")
+        assert utc == expected
+        assert offset == expected
+        assert date_only == datetime.datetime(2016, 5, 12)
+
+    def test_iso8601_to_datetime_fail(self):
+        rejected = False
+        try:
+            utility.iso8601_to_datetime("yesterday")
+        except cloudpassage.CloudPassageValidation:
+            rejected = True
+        assert rejected
+
+    def test_split_time_range(self):
+        windows = utility.split_time_range("2020-01-01",
+                                           "2020-01-01T00:00:25Z", 10)
+        assert len(windows) == 3
+        assert windows[0][0] == "2020-01-01T00:00:00.000000Z"
+        assert windows[0][1] == windows[1][0]
+        assert windows[2][1] == "2020-01-01T00:00:25.000000Z"